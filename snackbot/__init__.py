@@ -0,0 +1,3 @@
+# snackbot — бот-магазин снеков с доставкой по аудиториям.
+# Одна кодовая база для обеих установок; отличия (цены, доставка) — в config.json / окружении.
+# Запуск: python -m snackbot [webhook|polling|bench] или python sf.py.
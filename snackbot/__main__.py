@@ -0,0 +1,31 @@
+# snackbot/__main__.py
+# Единая точка входа: python -m snackbot [webhook|polling|bench]
+# Без аргумента режим берётся из SF_MODE (по умолчанию webhook).
+
+import sys
+
+from .startup import mark
+from . import config
+
+MODES = ("webhook", "polling", "bench")
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    mode = args.pop(0) if args else config.MODE
+    if mode not in MODES:
+        raise SystemExit(f"Неизвестный режим {mode!r}; доступны: {', '.join(MODES)}")
+
+    if mode == "bench":
+        from .bench import run_bench
+        run_bench(args)
+        return
+
+    from . import app
+    mark("imports")
+    if mode == "polling":
+        app.run_polling()
+    else:
+        app.run_webhook()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# snackbot/app.py
+# Сборка Application и режимы запуска: webhook (Render) и polling (локально / без публичного адреса).
+
+import asyncio
+from datetime import datetime, timedelta
+
+from telegram.ext import (
+    ApplicationBuilder, Application, CommandHandler, MessageHandler,
+    CallbackQueryHandler, ContextTypes, ExtBot, filters
+)
+
+from .startup import STARTUP_PROFILE, mark
+from .config import (
+    BOT_TOKEN, BASE_URL, WEBHOOK_SECRET_PATH, PORT, WEBHOOK_CACHE_TTL_H, FAST_START,
+    BOT_API_URL, MAX_CONCURRENT_UPDATES, log
+)
+from .db import db_init, db_meta_get, db_meta_set, db_warmup
+from .ui import menu_keyboard
+from .maintenance import schedule_maintenance
+from .tracing import TracedRequest
+from .pipeline import ChatSerializedUpdateProcessor
+from .handlers import start_cmd, history_cmd, skip_cmd, fixdb_cmd, batch_cmd, profile_cmd, cb_handler, text_handler, on_error
+
+# ---------------- Startup ----------------
+class CachedWebhookBot(ExtBot):
+    """Не вызывает setWebhook, если этот же URL уже регистрировали недавно (см. таблицу meta).
+    run_webhook дёргает setWebhook на каждом старте — на холодном старте это лишний запрос к Telegram.
+    """
+
+    async def set_webhook(self, url: str, *args, **kwargs) -> bool:
+        cached_url, cached_at = db_meta_get("webhook_url")
+        if FAST_START and cached_url == url and cached_at:
+            age = datetime.now() - datetime.fromisoformat(cached_at)
+            if age < timedelta(hours=WEBHOOK_CACHE_TTL_H):
+                log.info("Webhook уже установлен на %s — setWebhook пропущен", url)
+                mark("webhook")
+                return True
+        ok = await super().set_webhook(url, *args, **kwargs)
+        if ok:
+            db_meta_set("webhook_url", url)
+        mark("webhook")
+        return ok
+
+    async def delete_webhook(self, *args, **kwargs) -> bool:
+        # polling снимает вебхук — следующий webhook-старт обязан поставить его заново
+        ok = await super().delete_webhook(*args, **kwargs)
+        if ok:
+            db_meta_set("webhook_url", "")
+        return ok
+
+def _warmup():
+    db_warmup()
+    menu_keyboard()
+
+def _log_startup_profile():
+    mark("ready")
+    log.info("Startup profile", extra={f"{k}_ms": v for k, v in STARTUP_PROFILE})
+
+async def _startup_ready_job(context: ContextTypes.DEFAULT_TYPE):
+    _log_startup_profile()
+
+async def post_init(app: Application):
+    mark("post_init")
+    if app.job_queue:
+        # post_init идёт до setWebhook и запуска сервера; job queue стартует в app.start(),
+        # то есть когда вебхук поставлен и сервер уже слушает порт — тогда и считаем бота готовым
+        app.job_queue.run_once(_startup_ready_job, 0, name="startup_profile")
+    else:
+        _log_startup_profile()
+    if FAST_START:
+        # не блокируем запуск сервера: прогрев идёт параллельно в пуле потоков
+        # (app.create_task до app.start() PTB не отслеживает и ругается)
+        asyncio.get_running_loop().run_in_executor(None, _warmup)
+    else:
+        _warmup()
+
+def build_app() -> Application:
+    if not BOT_TOKEN:
+        raise RuntimeError("Не указан BOT_TOKEN")
+    db_init()
+    mark("db_init")
+
+    bot = CachedWebhookBot(
+        BOT_TOKEN,
+        base_url=BOT_API_URL,
+        # как у ApplicationBuilder по умолчанию: отдельный пул под getUpdates, широкий — под ответы
+        request=TracedRequest(connection_pool_size=256),
+        get_updates_request=TracedRequest(),  # long poll идёт вне апдейта — span'ов не даёт
+    )
+    app = (
+        ApplicationBuilder()
+        .bot(bot)
+        .concurrent_updates(ChatSerializedUpdateProcessor(MAX_CONCURRENT_UPDATES))
+        .post_init(post_init)
+        .build()
+    )
+    mark("build")
+    app.add_handler(CommandHandler("start", start_cmd))
+    app.add_handler(CommandHandler("history", history_cmd))
+    app.add_handler(CommandHandler("skip", skip_cmd))          # <-- фикс /skip
+    app.add_handler(CommandHandler("fixdb", fixdb_cmd))
+    app.add_handler(CommandHandler("batch", batch_cmd))
+    app.add_handler(CommandHandler("profile", profile_cmd))
+    app.add_handler(CallbackQueryHandler(cb_handler))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
+    app.add_error_handler(on_error)
+    if app.job_queue:
+        schedule_maintenance(app.job_queue)
+    else:
+        log.warning("JobQueue недоступна (нужен python-telegram-bot[job-queue]) — обслуживание базы отключено")
+    return app
+
+# ---------------- Режимы запуска ----------------
+def run_webhook():
+    """Блокирующий run_webhook — основной режим на Render."""
+    base = BASE_URL
+    if not base:
+        raise RuntimeError("BASE_URL не задан и не удалось определить автоматически. Укажи BASE_URL в Environment или положись на RENDER_EXTERNAL_URL. Для локального запуска: python -m snackbot polling")
+    app = build_app()
+    webhook_url = f"{base.rstrip('/')}/{WEBHOOK_SECRET_PATH}"
+
+    log.info("Starting webhook on 0.0.0.0:%s → %s (fast start: %s)", PORT, webhook_url, FAST_START)
+    app.run_webhook(
+        listen="0.0.0.0",
+        port=PORT,
+        url_path=WEBHOOK_SECRET_PATH,
+        webhook_url=webhook_url,
+    )
+
+def run_polling():
+    """Long polling — для локального запуска и хостов без публичного адреса (см. polling.py)."""
+    from .polling import run_polling_loop
+    app = build_app()
+    log.info("Starting polling")
+    run_polling_loop(app)
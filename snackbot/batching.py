@@ -0,0 +1,55 @@
+# snackbot/batching.py
+# Группировка открытых заказов по корпусу и этажу в один маршрут для курьера.
+
+from typing import Dict, Any, Tuple, List
+
+from .config import ROOM_RE
+from .db import db_batch_save, db_batch_get
+from .ui import fmt_items
+
+def room_group_key(room:str) -> Tuple[str, str]:
+    """'429Г' -> ('Г', '4'): корпус — буква, этаж — номер без двух последних цифр.
+    Нераспознанные аудитории попадают в общую группу ('?', '?').
+    """
+    m = ROOM_RE.fullmatch((room or "").strip())
+    if not m:
+        return "?", "?"
+    digits, letter = m.groups()
+    return letter.upper(), digits[:-2] or "0"
+
+def build_batches(orders:List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Группирует заказы по (корпус, этаж) и суммирует позиции корзин.
+    Самые большие группы — первыми.
+    """
+    groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for rec in orders:
+        key = room_group_key(rec.get("room") or "")
+        g = groups.setdefault(key, {"key": key, "orders": [], "items": {}, "total": 0})
+        g["orders"].append(rec)
+        g["total"] += rec.get("total") or 0
+        for k, q in rec["items"].items():
+            g["items"][k] = g["items"].get(k, 0) + q
+    return sorted(groups.values(), key=lambda g: (-len(g["orders"]), g["key"]))
+
+def fmt_batch(batch:Dict[str, Any]) -> str:
+    letter, floor = batch["key"]
+    orders = batch["orders"]
+    rooms = sorted({(o.get("room") or "—") for o in orders})
+    lines = [
+        f"📦 Корпус {letter}, этаж {floor} — заказов: {len(orders)}",
+        f"Аудитории: {', '.join(rooms)}",
+        fmt_items(batch["items"]),
+        f"\nЗаказы: {', '.join('#' + str(o['id']) for o in orders)}",
+        f"Сумма: {batch['total']}₽",
+    ]
+    notes = [f"#{o['id']}: {o['note']}" for o in orders if o.get("note") and o["note"] != "—"]
+    if notes:
+        lines.append("Комментарии:\n" + "\n".join(notes))
+    return "\n".join(lines)
+
+def register_batch(order_ids:List[int]) -> int:
+    """Запоминает заказы, показанные админу одним списком; id уходит в callback_data кнопок."""
+    return db_batch_save(order_ids)
+
+def get_batch(batch_id:int) -> List[int]:
+    return db_batch_get(batch_id)
@@ -0,0 +1,46 @@
+# snackbot/bench.py
+# Офлайн-бенчмарк горячих путей (без Telegram): запись заказа, выборка открытых, группировка, рендер.
+# Запуск: python -m snackbot bench [итераций]  — база временная, рабочая orders.db не трогается.
+
+import os, tempfile, time, random
+from typing import Callable, List
+
+from . import config
+from .config import MENU
+from .db import db_init, db_insert_order, db_get_order, db_open_orders
+from .ui import fmt_items, get_cart_subtotal, menu_keyboard, cart_keyboard
+from .batching import build_batches, fmt_batch
+
+ROOMS = ["429Г", "431Г", "512Г", "101А", "118А", "305Б", "307Б", "214В"]
+
+def _timeit(name:str, fn:Callable[[], object], n:int):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    dt = time.perf_counter() - t0
+    print(f"{name:<28} {n:>7}× {dt * 1e6 / n:>10.1f} мкс/оп")
+
+def _random_cart(rnd:random.Random) -> dict:
+    keys = list(MENU)
+    return {k: rnd.randint(1, 3) for k in rnd.sample(keys, rnd.randint(1, min(4, len(keys))))}
+
+def run_bench(args:List[str]):
+    n = int(args[0]) if args else 1000
+    rnd = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DB_PATH = os.path.join(tmp, "bench.db")
+        db_init()
+        carts = [_random_cart(rnd) for _ in range(64)]
+
+        def insert():
+            cart = rnd.choice(carts)
+            db_insert_order(1, "bench", rnd.choice(ROOMS), cart, "", get_cart_subtotal(cart))
+
+        _timeit("db_insert_order", insert, n)
+        _timeit("db_get_order", lambda: db_get_order(rnd.randint(1, n)), n)
+        orders = db_open_orders(config.BATCH_WINDOW_MIN)
+        _timeit(f"db_open_orders ({len(orders)} шт.)", lambda: db_open_orders(config.BATCH_WINDOW_MIN), max(1, n // 100))
+        _timeit("build_batches", lambda: [fmt_batch(b) for b in build_batches(orders)], max(1, n // 100))
+        _timeit("fmt_items + subtotal", lambda: (fmt_items(carts[0]), get_cart_subtotal(carts[0])), n)
+        _timeit("menu_keyboard", menu_keyboard, n)
+        _timeit("cart_keyboard", lambda: cart_keyboard(carts[0]), n)
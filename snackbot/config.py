@@ -0,0 +1,151 @@
+# snackbot/config.py
+# Единый конфиг для обеих установок (корень и sf_render).
+# Порядок: значения по умолчанию -> JSON-файл (SF_CONFIG, по умолчанию ./config.json) -> переменные окружения.
+
+import os, json, re
+from typing import Dict, Any
+
+from .startup import mark
+from .logs import setup_logging, parse_sample
+
+# ---------------- .env ----------------
+# На Render (.env там не бывает) не импортируем dotenv зря — это решается до чтения конфига,
+# поэтому смотрим только на переменную RENDER, которую выставляет сама платформа.
+if not os.getenv("RENDER") or os.path.exists(".env"):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except Exception:
+        pass
+mark("dotenv")
+
+# ---------------- Файл конфига ----------------
+CONFIG_PATH = os.getenv("SF_CONFIG", "config.json")
+
+def _load_file(path:str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        if "SF_CONFIG" in os.environ:
+            raise RuntimeError(f"SF_CONFIG указывает на несуществующий файл: {path}")
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise RuntimeError(f"{path}: ожидается JSON-объект с ключами вида DELIVERY_FEE, MENU, ...")
+    return data
+
+_FILE = _load_file(CONFIG_PATH)
+
+def _get(name:str, default:Any) -> Any:
+    """Окружение важнее файла, файл важнее значения по умолчанию.
+    Тип берётся из default: из окружения приходят только строки.
+    """
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return _FILE.get(name, default)
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    return raw
+
+# ---------------- Параметры ----------------
+# Быстрый старт для Render free-tier (сервис засыпает и просыпается на первом вебхуке):
+# не переустанавливаем тот же вебхук, прогреваем кэши в фоне. По умолчанию включён на Render.
+FAST_START = bool(_get("FAST_START", bool(os.getenv("RENDER"))))
+BOT_TOKEN = _get("BOT_TOKEN", "")
+_admins = _get("ADMIN_IDS", "")
+ADMIN_IDS = ({int(x) for x in _admins} if isinstance(_admins, list)
+             else {int(x) for x in str(_admins).replace(" ", "").split(",") if x})
+DB_PATH = _get("DB_PATH", "orders.db")
+# Сколько соединение ждёт блокировку базы (сек.), прежде чем упасть с "database is locked"
+DB_TIMEOUT_S = _get("DB_TIMEOUT_S", 30)
+
+def _auto_base_url() -> str:
+    base = _get("BASE_URL", "") or os.getenv("RENDER_EXTERNAL_URL")
+    if base:
+        return base.rstrip("/")
+    host = os.getenv("RENDER_EXTERNAL_HOSTNAME")
+    if host:
+        return f"https://{host}".rstrip("/")
+    return ""
+
+BASE_URL = _auto_base_url()
+WEBHOOK_SECRET_PATH = _get("WEBHOOK_SECRET_PATH", "tgwebhook")
+PORT = int(os.environ.get("PORT", "10000"))
+# Через сколько часов всё-таки повторить setWebhook, даже если URL не менялся
+WEBHOOK_CACHE_TTL_H = _get("WEBHOOK_CACHE_TTL_H", 24)
+# Режим запуска по умолчанию: webhook | polling | bench (можно переопределить аргументом)
+MODE = _get("SF_MODE", "webhook")
+# Адрес Bot API; для нагрузочных прогонов можно указать локальный фейковый сервер
+BOT_API_URL = _get("BOT_API_URL", "https://api.telegram.org/bot")
+# Сколько апдейтов обрабатываем одновременно (апдейты одного чата — всегда по очереди)
+MAX_CONCURRENT_UPDATES = _get("MAX_CONCURRENT_UPDATES", 32)
+# Polling: размер пачки getUpdates (1..100) и таймаут long polling в секундах
+POLL_LIMIT = max(1, min(100, _get("POLL_LIMIT", 100)))
+POLL_TIMEOUT = _get("POLL_TIMEOUT", 30)
+
+# История заказов: сколько последних показываем и кэш на пользователя
+HISTORY_LIMIT = _get("HISTORY_LIMIT", 5)
+HISTORY_CACHE_SIZE = _get("HISTORY_CACHE_SIZE", 500)
+HISTORY_CACHE_TTL_S = _get("HISTORY_CACHE_TTL_S", 600)
+
+# Сколько последних экранов (чат, сообщение) помнить, чтобы не слать одинаковые правки
+VIEW_CACHE_SIZE = _get("VIEW_CACHE_SIZE", 5000)
+
+# Обслуживание базы: архив закрытых заказов, vacuum/ANALYZE и бэкап в «тихие часы» (часы сервера)
+ARCHIVE_AFTER_DAYS = _get("ARCHIVE_AFTER_DAYS", 30)
+ARCHIVE_BATCH = _get("ARCHIVE_BATCH", 200)
+ARCHIVE_DB_PATH = _get("ARCHIVE_DB_PATH", os.path.splitext(DB_PATH)[0] + "_archive.db")
+QUIET_HOURS = _get("QUIET_HOURS", "3-6")
+VACUUM_PAGES = _get("VACUUM_PAGES", 2000)
+BACKUP_DIR = _get("BACKUP_DIR", "backups")
+BACKUP_KEEP = _get("BACKUP_KEEP", 7)
+MAINTENANCE_INTERVAL_MIN = _get("MAINTENANCE_INTERVAL_MIN", 30)
+
+# Трассировка (выкл., если пусто): file:traces.jsonl или otlp:http://127.0.0.1:4318/v1/traces; доля апдейтов
+TRACE_EXPORT = _get("TRACE_EXPORT", "")
+TRACE_SAMPLE = float(_get("TRACE_SAMPLE", "1.0"))
+# Сэмплирующий профайлер (/profile): шаг, длительность по умолчанию и максимум, куда класть collapsed stacks
+PROFILE_INTERVAL_MS = _get("PROFILE_INTERVAL_MS", 5)
+PROFILE_DEFAULT_S = _get("PROFILE_DEFAULT_S", 30)
+PROFILE_MAX_S = _get("PROFILE_MAX_S", 600)
+PROFILE_DIR = _get("PROFILE_DIR", "profiles")
+
+# Логи: json | text; семплирование шумных событий "шаблон=доля;..." и лимит одинаковых warning в минуту
+LOG_LEVEL = _get("LOG_LEVEL", "INFO")
+LOG_FORMAT = _get("LOG_FORMAT", "json")
+LOG_SAMPLE = _get("LOG_SAMPLE", "items_json parse failed=0.1")
+LOG_RATE_PER_MIN = _get("LOG_RATE_PER_MIN", 20)
+log = setup_logging(LOG_LEVEL, LOG_FORMAT, parse_sample(LOG_SAMPLE), LOG_RATE_PER_MIN)
+
+DELIVERY_FEE = _get("DELIVERY_FEE", 0)
+ROOM_RE = re.compile(r'^(\d+)([A-Za-zА-Яа-я])$')  # 429Г -> номер 429 (этаж 4), корпус Г
+
+# Группировка доставки: открытые заказы за последние BATCH_WINDOW_MIN минут
+# собираются по корпусу и этажу в один маршрут для курьера.
+BATCH_WINDOW_MIN = _get("BATCH_WINDOW_MIN", 30)
+BATCH_HINT_MIN_ORDERS = _get("BATCH_HINT_MIN_ORDERS", 2)
+OPEN_STATUSES = ("NEW", "ACCEPTED")
+# Порядок статусов доставки: групповые кнопки двигают заказ только вперёд по нему (CANCELED — вне цепочки)
+STATUS_FLOW = ("NEW", "ACCEPTED", "ON_THE_WAY", "DELIVERED")
+STATUS_TEXT = {
+    "ACCEPTED": "✅ принят",
+    "ON_THE_WAY": "🛵 в пути",
+    "DELIVERED": "📦 доставлен",
+    "CANCELED": "🚫 отменён"
+}
+
+_DEFAULT_MENU: Dict[str, tuple] = {
+    "energy": ("ЭНЕРГИЯ", 59),
+    "cola": ("КОЛА (ориг)", 99),
+    "chips": ("ЧИПСЫ", 72),
+    "pepsi": ("ПЕПСИ (ориг)", 96),
+    "water": ("ВОДА", 44),
+    "chocopie": ("ЧОКОПАЙ", 25),
+    "7up": ("СЕВЭНАП (ориг)", 96),
+    "twix": ("ТВИКС(бол)", 108),
+    "sok": ("СОК (ябл)", 49),
+}
+
+# В файле меню задаётся как {"код": ["Название", цена], ...}; порядок ключей = порядок кнопок
+MENU: Dict[str, tuple] = {str(k): (str(v[0]), int(v[1])) for k, v in _FILE.get("MENU", _DEFAULT_MENU).items()}
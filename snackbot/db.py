@@ -0,0 +1,232 @@
+# snackbot/db.py
+# SQLite: заказы, служебная таблица meta, починка старых записей.
+# Путь берём как config.DB_PATH в момент вызова — так бенчмарк может подставить временную базу.
+
+import os, json, sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Any, Tuple, List
+
+from . import config
+from .config import ROOM_RE, OPEN_STATUSES, log
+from .tracing import traced
+
+def _connect() -> sqlite3.Connection:
+    # таймаут длиннее дефолтных 5 с: фоновый бэкап/ANALYZE не должны ронять хендлеры
+    return sqlite3.connect(config.DB_PATH, timeout=config.DB_TIMEOUT_S)
+
+def db_init():
+    os.makedirs(os.path.dirname(config.DB_PATH) or ".", exist_ok=True)
+    conn = _connect()
+    cur = conn.cursor()
+    # действует только на новой пустой базе; старые переводит maintenance.db_vacuum_analyze
+    cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            username TEXT,
+            room TEXT,
+            items_json TEXT,
+            note TEXT,
+            total INTEGER,
+            status TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders(status, created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_orders_user ON orders(user_id, id)")
+    cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT, updated_at TEXT)")
+    conn.commit()
+    conn.close()
+
+def db_meta_get(key:str) -> Tuple[str, str]:
+    """(value, updated_at) служебной записи или ('', '') если её нет."""
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute("SELECT value, updated_at FROM meta WHERE key=?", (key,))
+    row = cur.fetchone()
+    conn.close()
+    return (row[0] or "", row[1] or "") if row else ("", "")
+
+def db_meta_set(key:str, value:str):
+    conn = _connect()
+    cur = conn.cursor()
+    now = datetime.now().isoformat(timespec="seconds")
+    cur.execute("""
+        INSERT INTO meta (key, value, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at
+    """, (key, value, now))
+    conn.commit()
+    conn.close()
+
+BATCH_KEEP_DAYS = 2  # старше — кнопки списка /batch считаем устаревшими
+
+def db_batch_save(order_ids:List[int]) -> int:
+    """Сохраняет список /batch в meta (batch:<id> -> '1,2,3') и возвращает его id.
+    Список переживает рестарт процесса — на Render free-tier он случается постоянно.
+    """
+    conn = _connect()
+    cur = conn.cursor()
+    now = datetime.now().isoformat(timespec="seconds")
+    cutoff = (datetime.now() - timedelta(days=BATCH_KEEP_DAYS)).isoformat(timespec="seconds")
+    with conn:
+        cur.execute("""
+            INSERT INTO meta (key, value, updated_at) VALUES ('batch_seq', '1', ?)
+            ON CONFLICT(key) DO UPDATE SET value=CAST(value AS INTEGER) + 1, updated_at=excluded.updated_at
+        """, (now,))
+        bid = int(cur.execute("SELECT value FROM meta WHERE key='batch_seq'").fetchone()[0])
+        cur.execute("INSERT OR REPLACE INTO meta (key, value, updated_at) VALUES (?, ?, ?)",
+                    (f"batch:{bid}", ",".join(str(i) for i in order_ids), now))
+        cur.execute("DELETE FROM meta WHERE key LIKE 'batch:%' AND updated_at < ?", (cutoff,))
+    conn.close()
+    return bid
+
+def db_batch_get(batch_id:int) -> List[int]:
+    """id заказов списка /batch; [] — список не найден или устарел."""
+    value = db_meta_get(f"batch:{batch_id}")[0]
+    return [int(x) for x in value.split(",") if x]
+
+def db_warmup():
+    """Открываем базу и читаем индекс открытых заказов, чтобы первый запрос не ждал диска."""
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM orders WHERE status IN ('NEW', 'ACCEPTED')")
+    cur.fetchone()
+    conn.close()
+
+@traced("db.insert_order")
+def db_insert_order(user_id:int, username:str, room:str, items:Dict[str,int], note:str, total:int)->int:
+    conn = _connect()
+    cur = conn.cursor()
+    now = datetime.now().isoformat(timespec="seconds")
+    cur.execute("""
+        INSERT INTO orders (user_id, username, room, items_json, note, total, status, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, 'NEW', ?, ?)
+    """, (user_id, username or "", room, json.dumps(items, ensure_ascii=False), note or "", total, now, now))
+    conn.commit()
+    oid = cur.lastrowid
+    conn.close()
+    return oid
+
+@traced("db.update_status")
+def db_update_status(order_id:int, status:str):
+    conn = _connect()
+    cur = conn.cursor()
+    now = datetime.now().isoformat(timespec="seconds")
+    cur.execute("UPDATE orders SET status=?, updated_at=? WHERE id=?", (status, now, order_id))
+    conn.commit()
+    conn.close()
+
+def _parse_items_json(value: str) -> Dict[str, int]:
+    """Пытаемся распарсить корректный JSON; если нет — поддержим старый формат str(dict).
+    Если внутри случайно лежит 'комната' (например '455U'/'456В'), тихо возвращаем пустой dict без warning.
+    """
+    if not value:
+        return {}
+    if ROOM_RE.fullmatch(value.strip()):
+        return {}
+    try:
+        obj = json.loads(value)
+        if isinstance(obj, dict):
+            return {str(k): int(v) for k, v in obj.items()}
+        return {}
+    except Exception as e_json:
+        try:
+            import ast
+            obj = ast.literal_eval(value)
+            if isinstance(obj, dict):
+                return {str(k): int(v) for k, v in obj.items()}
+        except Exception as e_ast:
+            # сырое значение обрезаем: битые строки бывают длинными, а событие частое
+            log.warning("items_json parse failed", extra={"raw": value[:80], "raw_len": len(value),
+                                                          "json_err": repr(e_json), "ast_err": repr(e_ast)})
+            return {}
+
+ORDER_KEYS = ["id","user_id","username","room","items_json","note","total","status","created_at","updated_at"]
+
+def _order_from_row(row) -> Dict[str, Any]:
+    rec = dict(zip(ORDER_KEYS,row))
+    rec["items"] = _parse_items_json((rec.get("items_json") or "").strip())
+    return rec
+
+@traced("db.get_order")
+def db_get_order(order_id:int):
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM orders WHERE id=?", (order_id,))
+    row = cur.fetchone()
+    conn.close()
+    if not row:
+        return None
+    return _order_from_row(row)
+
+@traced("db.open_orders")
+def db_open_orders(window_min:int) -> List[Dict[str, Any]]:
+    """Открытые (NEW/ACCEPTED) заказы, созданные за последние window_min минут."""
+    since = (datetime.now() - timedelta(minutes=window_min)).isoformat(timespec="seconds")
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT * FROM orders
+        WHERE status IN ({",".join("?" * len(OPEN_STATUSES))}) AND created_at >= ?
+        ORDER BY id
+    """, (*OPEN_STATUSES, since))
+    rows = cur.fetchall()
+    conn.close()
+    return [_order_from_row(r) for r in rows]
+
+@traced("db.open_rooms")
+def db_open_rooms(window_min:int) -> List[str]:
+    """Только аудитории открытых заказов за window_min минут — без разбора items_json (горячий путь confirm)."""
+    since = (datetime.now() - timedelta(minutes=window_min)).isoformat(timespec="seconds")
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT room FROM orders
+        WHERE status IN ({",".join("?" * len(OPEN_STATUSES))}) AND created_at >= ?
+    """, (*OPEN_STATUSES, since))
+    rooms = [r[0] or "" for r in cur.fetchall()]
+    conn.close()
+    return rooms
+
+@traced("db.user_orders")
+def db_user_orders(user_id:int, limit:int) -> List[Dict[str, Any]]:
+    """Последние заказы пользователя (по индексу idx_orders_user), новые первыми."""
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM orders WHERE user_id=? ORDER BY id DESC LIMIT ?", (user_id, limit))
+    rows = cur.fetchall()
+    conn.close()
+    return [_order_from_row(r) for r in rows]
+
+def db_sanitize() -> Tuple[int, int]:
+    """Оздоровление старых записей: очищаем items_json, если он не парсится;
+    если room пустая, а items_json выглядит как 'комната' — переносим в room.
+    Возвращаем (count_fixed, moved_to_room).
+    """
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute("SELECT id, items_json, room FROM orders")
+    rows = cur.fetchall()
+    fixed = moved = 0
+    for oid, items_json, room in rows:
+        raw = (items_json or "").strip()
+        items = _parse_items_json(raw)
+        if items:
+            continue
+        if raw and ROOM_RE.fullmatch(raw):
+            if not room or room.strip() == "—":
+                cur.execute("UPDATE orders SET room=?, items_json='{}' WHERE id=?", (raw.upper(), oid))
+                moved += 1
+            else:
+                cur.execute("UPDATE orders SET items_json='{}' WHERE id=?", (oid,))
+                fixed += 1
+        else:
+            if raw not in ("", "{}", "null", "None"):
+                cur.execute("UPDATE orders SET items_json='{}' WHERE id=?", (oid,))
+                fixed += 1
+    conn.commit()
+    conn.close()
+    return fixed, moved
+
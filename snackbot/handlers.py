@@ -0,0 +1,363 @@
+# snackbot/handlers.py
+# Сценарий: меню -> корзина -> (при оформлении) запрос аудитории -> комментарий (опционально /skip) -> подтверждение.
+# Плюс история с повтором заказа (/history), админские статусы, /fixdb, /batch и /profile.
+
+import asyncio, threading
+from typing import Dict, Any
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from .config import (
+    ADMIN_IDS, DELIVERY_FEE, MENU, ROOM_RE, STATUS_TEXT, STATUS_FLOW,
+    BATCH_WINDOW_MIN, BATCH_HINT_MIN_ORDERS, PROFILE_DEFAULT_S, PROFILE_MAX_S, log
+)
+from .profiler import PROFILER
+from .maintenance import db_convert_auto_vacuum
+from .db import db_insert_order, db_update_status, db_get_order, db_open_orders, db_open_rooms, db_sanitize
+from .ui import get_cart_subtotal, admin_order_kb, batch_kb
+from .views import (
+    ROOM_PROMPT, menu_view, cart_view, checkout_view, confirm_prompt_view, receipt_text, admin_order_text,
+    cart_total, edit_view, reply_view
+)
+from .logs import set_order_id
+from .history import get_history, invalidate_history, find_user_order, restore_cart, fmt_history, history_kb
+from .batching import room_group_key, build_batches, fmt_batch, register_batch, get_batch
+
+STATE: Dict[int, Dict[str, Any]] = {}
+
+async def ensure_state(update: Update)->Dict[str,Any]:
+    chat_id = update.effective_chat.id
+    if chat_id not in STATE:
+        STATE[chat_id] = {"room": None, "cart": {}, "note": None, "awaiting": None}
+    return STATE[chat_id]
+
+async def start_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    st = await ensure_state(update)
+    # Новый сценарий: сначала меню, потом аудитория при оформлении
+    st["awaiting"] = None
+    await reply_view(update.message, menu_view(
+        f"Привет! 🍫 Выбирай из меню, доставка {DELIVERY_FEE}₽. Когда будешь готов — жми «Оформить»."
+    ))
+
+async def fixdb_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/fixdb — почистить старые записи; /fixdb vacuum — разово перевести базу в incremental vacuum."""
+    user_id = update.effective_user.id
+    if user_id not in ADMIN_IDS:
+        await update.message.reply_text("⛔ Команда только для администраторов.")
+        return
+    if context.args and context.args[0].lower() == "vacuum":
+        await update.message.reply_text("⏳ Полный VACUUM: на это время база заблокирована для записи…")
+        converted = await asyncio.to_thread(db_convert_auto_vacuum)
+        await update.message.reply_text("✅ База переведена в auto_vacuum=INCREMENTAL." if converted
+                                        else "База уже в auto_vacuum=INCREMENTAL — ничего делать не нужно.")
+        return
+    fixed, moved = db_sanitize()
+    await update.message.reply_text(f"✅ База очищена.\nИсправлено записей: {fixed}\nПеренесено в room: {moved}")
+
+async def batch_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/batch [минуты] — открытые заказы, сгруппированные по корпусу и этажу, по одному списку на маршрут."""
+    user_id = update.effective_user.id
+    if user_id not in ADMIN_IDS:
+        await update.message.reply_text("⛔ Команда только для администраторов.")
+        return
+    window = BATCH_WINDOW_MIN
+    if context.args:
+        try:
+            window = max(1, int(context.args[0]))
+        except ValueError:
+            await update.message.reply_text("Формат: /batch [минуты], например /batch 45")
+            return
+    batches = build_batches(db_open_orders(window))
+    if not batches:
+        await update.message.reply_text(f"Открытых заказов за последние {window} мин нет.")
+        return
+    for batch in batches:
+        bid = register_batch([o["id"] for o in batch["orders"]])
+        await update.message.reply_text(fmt_batch(batch), reply_markup=batch_kb(bid))
+
+async def history_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/history — последние заказы с кнопками «🔁 Повторить»."""
+    await ensure_state(update)
+    orders = get_history(update.effective_user.id)
+    if not orders:
+        await reply_view(update.message, menu_view("Заказов пока нет. Выбирай из меню:"))
+        return
+    await reply_view(update.message, (fmt_history(orders), history_kb(orders)))
+
+async def send_profile(context: ContextTypes.DEFAULT_TYPE, chat_id:int):
+    await context.bot.send_message(chat_id, PROFILER.report())
+    if not PROFILER.samples:
+        return  # пустой файл Telegram не примет ("file must be non-empty")
+    path = await asyncio.to_thread(PROFILER.dump_collapsed)
+    with open(path, "rb") as f:
+        await context.bot.send_document(chat_id, f, caption="collapsed stacks (flamegraph.pl / speedscope)")
+
+async def profile_report_job(context: ContextTypes.DEFAULT_TYPE):
+    if PROFILER.stop():
+        await send_profile(context, context.job.chat_id)
+
+async def profile_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/profile [секунды] — сэмплирующий профайлер event loop'а; /profile stop — остановить раньше.
+    Отчёт (горячие функции и стеки) приходит в этот чат.
+    """
+    user_id = update.effective_user.id
+    if user_id not in ADMIN_IDS:
+        await update.message.reply_text("⛔ Команда только для администраторов.")
+        return
+    chat_id = update.effective_chat.id
+    arg = context.args[0].lower() if context.args else ""
+    if arg == "stop":
+        if context.job_queue:
+            for job in context.job_queue.get_jobs_by_name("profile_report"):
+                job.schedule_removal()
+        if not PROFILER.stop():
+            await update.message.reply_text("Профайлер не запущен. Запустить: /profile [секунды]")
+            return
+        await send_profile(context, chat_id)
+        return
+    if PROFILER.running:
+        await update.message.reply_text("Профайлер уже работает. Остановить и получить отчёт: /profile stop")
+        return
+    duration = int(arg) if arg.isdigit() else PROFILE_DEFAULT_S
+    duration = min(duration, PROFILE_MAX_S)  # опечатка вроде /profile 999999 не должна сэмплировать сутками
+    # хендлер выполняется в потоке event loop — его и сэмплируем
+    PROFILER.start(threading.get_ident(), duration)
+    if context.job_queue:
+        context.job_queue.run_once(profile_report_job, duration + 1, chat_id=chat_id, name="profile_report")
+        await update.message.reply_text(f"🔥 Профилирую {duration} с, отчёт пришлю сюда. Остановить раньше: /profile stop")
+    else:
+        await update.message.reply_text(f"🔥 Профилирую {duration} с. Отчёт: /profile stop")
+
+async def skip_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработка /skip — работает теперь как отдельная команда (не режется фильтром)."""
+    st = await ensure_state(update)
+    if st.get("awaiting") != "comment":
+        await reply_view(update.message, menu_view("Сейчас нечего пропускать. Выбирай позиции в меню или жми «Оформить»."))
+        return
+    st["note"] = None
+    st["awaiting"] = None
+    await reply_view(update.message, confirm_prompt_view(st, "Комментарий пропущен ✅"))
+
+async def cb_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    chat_id = query.message.chat.id
+    user = update.effective_user
+    st = STATE.setdefault(chat_id, {"room": None, "cart": {}, "note": None, "awaiting": None})
+    data = query.data
+
+    if data == "change_room":
+        st["awaiting"] = "room"
+        await edit_view(query, (ROOM_PROMPT, None))
+        return
+
+    if data.startswith("add:"):
+        item = data.split(":", 1)[1]
+        if item not in MENU:
+            await edit_view(query, menu_view("Этой позиции больше нет в меню. Продолжай выбирать:"))
+            return
+        st["cart"][item] = st["cart"].get(item, 0) + 1
+        await edit_view(query, menu_view(
+            f"Добавил: {MENU[item][0]} — {MENU[item][1]}₽\n"
+            f"Текущая сумма товаров: {get_cart_subtotal(st['cart'])}₽"
+        ))
+        return
+
+    if data == "history":
+        orders = get_history(user.id)
+        if not orders:
+            await edit_view(query, menu_view("Заказов пока нет. Выбирай из меню:"))
+            return
+        await edit_view(query, (fmt_history(orders), history_kb(orders)))
+        return
+
+    if data.startswith("reorder:"):
+        try:
+            order_id = int(data.split(":", 1)[1])
+        except ValueError:
+            return
+        rec = find_user_order(user.id, order_id)
+        if not rec:
+            # query.answer() уже вызван — второй ответ Telegram отклонит, поэтому меняем экран
+            await edit_view(query, menu_view(f"Заказ #{order_id} больше недоступен (возможно, ушёл в архив). Выбирай из меню:"))
+            return
+        cart, dropped = restore_cart(rec["items"])
+        if not cart:
+            await edit_view(query, menu_view("Этих позиций больше нет в меню. Выбирай заново:"))
+            return
+        st["cart"] = cart
+        st["awaiting"] = None
+        if not st["room"]:
+            st["room"] = rec["room"] or None
+        footer = ""
+        if dropped:
+            footer += f"\n\n⚠️ Больше нет в меню: {len(dropped)} поз. — убрали из корзины."
+        if cart_total(cart) != rec["total"]:
+            footer += f"\nℹ️ Цены обновились: в прошлый раз было {rec['total']}₽."
+        await edit_view(query, cart_view(st, f"🔁 Повтор заказа #{order_id}:", footer))
+        return
+
+    if data == "cart":
+        await edit_view(query, cart_view(st))
+        return
+
+    if data.startswith("del:"):
+        item = data.split(":", 1)[1]
+        if st["cart"].get(item, 0) > 1:
+            st["cart"][item] -= 1
+        else:
+            st["cart"].pop(item, None)
+        await edit_view(query, cart_view(st, "🧺 Твоя корзина (обновлено):"))
+        return
+
+    if data == "back2menu":
+        await edit_view(query, menu_view("Продолжай выбирать:"))
+        return
+
+    if data == "checkout":
+        if not st["cart"]:
+            await edit_view(query, menu_view("Корзина пуста."))
+            return
+        # Новый сценарий: если аудитория не указана — сначала спросим, потом комментарий/подтверждение
+        if not st["room"]:
+            st["awaiting"] = "room"
+            await edit_view(query, (ROOM_PROMPT, None))
+            return
+
+        # если аудитория уже есть — сразу к подтверждению с опцией комментария
+        await edit_view(query, checkout_view(st))
+        return
+
+    if data == "add_comment":
+        st["awaiting"] = "comment"
+        await edit_view(query, ("Напиши комментарий (или /skip чтобы пропустить):", None))
+        return
+
+    if data == "confirm":
+        grand = cart_total(st["cart"])
+        note = st.get("note") or "—"
+        order_id = db_insert_order(user.id, user.username or "", st["room"], st["cart"], note, grand)
+        set_order_id(order_id)
+        invalidate_history(user.id)
+
+        admin_text = admin_order_text(order_id, user.username, user.id, st["room"], st["cart"], note)
+        same_group = room_group_key(st["room"])
+        group_size = sum(1 for room in db_open_rooms(BATCH_WINDOW_MIN) if room_group_key(room) == same_group)
+        if group_size >= BATCH_HINT_MIN_ORDERS:
+            admin_text += f"\n\n📦 Открытых заказов на этом этаже: {group_size} — собрать маршрут: /batch"
+        for aid in ADMIN_IDS:
+            try:
+                await context.bot.send_message(aid, admin_text, reply_markup=admin_order_kb(order_id))
+            except Exception as e:
+                log.warning("Admin notify fail: %r", e, extra={"admin_id": aid})
+
+        await query.edit_message_reply_markup(reply_markup=None)
+        await context.bot.send_message(chat_id=chat_id, text=receipt_text(order_id, st["cart"], note))
+        st["cart"].clear()
+        st["note"] = None
+        # Аудиторию оставляем, чтобы было удобно, но можно сменить кнопкой «Сменить аудиторию».
+        return
+
+    if data.startswith("adm:") or data.startswith("bat:"):
+        # callback_data присылает клиент — кнопки админа мог «нажать» кто угодно
+        if user.id not in ADMIN_IDS:
+            log.warning("Admin callback from non-admin", extra={"user_id": user.id, "data": data})
+            return
+
+    # query.answer() уже вызван в начале — ошибки дальше сообщаем обычным сообщением
+    if data.startswith("adm:"):
+        try:
+            _, oid_str, status = data.split(":")
+            order_id = int(oid_str)
+            set_order_id(order_id)
+        except Exception:
+            await context.bot.send_message(chat_id, text="Неверный формат ID")
+            return
+
+        rec = db_get_order(order_id)
+        if not rec:
+            await context.bot.send_message(chat_id, text=f"Заказ #{order_id} не найден (мог уйти в архив).")
+            return
+
+        db_update_status(order_id, status)
+        invalidate_history(rec["user_id"])
+        await notify_status(context, rec, status)
+        await context.bot.send_message(chat_id, text=f"Заказ #{order_id} обновлён → {STATUS_TEXT.get(status, status)}")
+        return
+
+    if data.startswith("bat:"):
+        try:
+            _, bid_str, status = data.split(":")
+            order_ids = get_batch(int(bid_str))
+            target = STATUS_FLOW.index(status)
+        except Exception:
+            order_ids = []
+        if not order_ids:
+            await context.bot.send_message(chat_id, text="Список устарел — запроси заново: /batch")
+            return
+
+        updated = []
+        for order_id in order_ids:
+            rec = db_get_order(order_id)
+            # заказы могли продвинуть или закрыть по отдельности — назад по цепочке не откатываем
+            if not rec or rec["status"] not in STATUS_FLOW or STATUS_FLOW.index(rec["status"]) >= target:
+                continue
+            db_update_status(order_id, status)
+            invalidate_history(rec["user_id"])
+            await notify_status(context, rec, status)
+            updated.append(order_id)
+        if not updated:
+            await context.bot.send_message(
+                chat_id, text=f"Обновлять нечего: заказы этого списка уже {STATUS_TEXT.get(status, status)} или дальше."
+            )
+            return
+        await context.bot.send_message(
+            chat_id,
+            text=f"Заказы {', '.join('#' + str(i) for i in updated)} обновлены → {STATUS_TEXT.get(status, status)}"
+        )
+        return
+
+async def notify_status(context: ContextTypes.DEFAULT_TYPE, rec:Dict[str, Any], status:str):
+    msg = f"Статус твоего заказа #{rec['id']}: {STATUS_TEXT.get(status, status)}"
+    try:
+        await context.bot.send_message(rec["user_id"], msg)
+    except Exception:
+        pass
+
+async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    st = await ensure_state(update)
+    text = (update.message.text or "").strip()
+
+    if st.get("awaiting") == "room":
+        if not ROOM_RE.fullmatch(text):
+            await update.message.reply_text("Формат аудитории: цифры + буква (например, 429Г).")
+            return
+        st["room"] = text.upper()
+        st["awaiting"] = None
+
+        # После установки аудитории показываем сводку и предлагаем комментарий/подтверждение
+        if not st["cart"]:
+            await reply_view(update.message, menu_view("Аудитория сохранена. Корзина пуста — выбери позиции из меню:"))
+            return
+        await reply_view(update.message, checkout_view(st))
+        return
+
+    if st.get("awaiting") == "comment":
+        if text == "/skip":
+            # На случай если /skip придёт текстом (не как команда)
+            st["note"] = None
+        else:
+            st["note"] = text
+        st["awaiting"] = None
+        await reply_view(update.message, confirm_prompt_view(st, "Комментарий сохранён ✅"))
+        return
+
+    # По умолчанию — просто открываем меню снова
+    await reply_view(update.message, menu_view("Добавляй позиции из меню:"))
+
+# ---------------- Error handler ----------------
+async def on_error(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+    log.exception("Unhandled error in handler", exc_info=context.error)
+
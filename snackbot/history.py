@@ -0,0 +1,74 @@
+# snackbot/history.py
+# История заказов покупателя и повтор заказа в одно нажатие.
+# Последние заказы держим в небольшом LRU-кэше на пользователя; сбрасываем при новом заказе и смене статуса.
+
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from .config import MENU, STATUS_TEXT, HISTORY_LIMIT, HISTORY_CACHE_SIZE, HISTORY_CACHE_TTL_S
+from .db import db_user_orders, db_get_order
+from .tracing import traced
+
+_CACHE: "OrderedDict[int, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+
+def get_history(user_id:int) -> List[Dict[str, Any]]:
+    now = time.monotonic()
+    hit = _CACHE.get(user_id)
+    if hit and now - hit[0] < HISTORY_CACHE_TTL_S:
+        _CACHE.move_to_end(user_id)
+        return hit[1]
+    orders = db_user_orders(user_id, HISTORY_LIMIT)
+    _CACHE[user_id] = (now, orders)
+    _CACHE.move_to_end(user_id)
+    while len(_CACHE) > HISTORY_CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return orders
+
+def invalidate_history(user_id:int):
+    _CACHE.pop(user_id, None)
+
+def find_user_order(user_id:int, order_id:int):
+    """Заказ пользователя: сначала из кэша истории, иначе из базы — старые кнопки /history
+    продолжают работать и после новых заказов. Чужие id сюда не попадут.
+    """
+    rec = next((o for o in get_history(user_id) if o["id"] == order_id), None)
+    if rec is None:
+        rec = db_get_order(order_id)
+    return rec if rec and rec["user_id"] == user_id else None
+
+def restore_cart(items:Dict[str, int]) -> Tuple[Dict[str, int], List[str]]:
+    """Корзина из старого заказа по текущему MENU: позиции, которых больше нет, отбрасываем.
+    Возвращает (корзина, коды отброшенных позиций). Цены считаются заново по MENU при выводе.
+    """
+    cart, dropped = {}, []
+    for k, q in items.items():
+        if k in MENU and q > 0:
+            cart[k] = q
+        else:
+            dropped.append(k)
+    return cart, dropped
+
+def _fmt_date(iso:str) -> str:
+    try:
+        return datetime.fromisoformat(iso).strftime("%d.%m %H:%M")
+    except (TypeError, ValueError):
+        return "—"
+
+@traced("render.history")
+def fmt_history(orders:List[Dict[str, Any]]) -> str:
+    lines = ["📜 Твои последние заказы:"]
+    for o in orders:
+        status = STATUS_TEXT.get(o["status"], "🆕 новый" if o["status"] == "NEW" else o["status"])
+        items = ", ".join(f"{MENU[k][0] if k in MENU else k} ×{q}" for k, q in o["items"].items()) or "—"
+        lines.append(f"\n#{o['id']} · {_fmt_date(o['created_at'])} · {o['room'] or '—'} · {o['total']}₽ · {status}\n{items}")
+    return "\n".join(lines)
+
+def history_kb(orders:List[Dict[str, Any]]) -> InlineKeyboardMarkup:
+    rows = [[InlineKeyboardButton(f"🔁 Повторить #{o['id']}", callback_data=f"reorder:{o['id']}")]
+            for o in orders if restore_cart(o["items"])[0]]
+    rows.append([InlineKeyboardButton("➕ В меню", callback_data="back2menu")])
+    return InlineKeyboardMarkup(rows)
@@ -0,0 +1,152 @@
+# snackbot/logs.py
+# Логи без нагрузки на event loop: хендлеры только кладут запись в очередь (QueueHandler),
+# форматирование и запись в stdout — в отдельном потоке (QueueListener).
+# Формат — JSON-строка на событие; к каждой строке добавляются update_id / chat_id / order_id
+# текущего апдейта. Шумные предупреждения семплируются и ограничиваются по частоте.
+
+import sys, json, time, queue, atexit, logging, threading, contextvars
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Optional
+
+# Корреляция: выставляются конвейером (pipeline.py) на время обработки апдейта
+UPDATE_ID: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("update_id", default=None)
+CHAT_ID: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("chat_id", default=None)
+ORDER_ID: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("order_id", default=None)
+_CORRELATION = (("update_id", UPDATE_ID), ("chat_id", CHAT_ID), ("order_id", ORDER_ID))
+
+# Стандартные атрибуты LogRecord — всё остальное в record.__dict__ пришло через extra=
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+def set_order_id(order_id:Optional[int]):
+    ORDER_ID.set(order_id)
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record:logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=repr)
+
+class TextFormatter(logging.Formatter):
+    """Прежний человекочитаемый формат для локального запуска + поля корреляции в конце строки."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s | %(levelname)s | %(message)s")
+
+    def format(self, record:logging.LogRecord) -> str:
+        line = super().format(record)
+        extra = " ".join(f"{k}={v}" for k, v in record.__dict__.items() if k not in _RESERVED and not k.startswith("_"))
+        return f"{line} | {extra}" if extra else line
+
+class SamplingFilter(logging.Filter):
+    """Семплирование и ограничение частоты по событию (шаблону сообщения).
+    sample: {шаблон или его начало: доля 0..1}; rate_per_min — не больше N одинаковых
+    предупреждений в минуту, остальные считаются и отчитываются полем suppressed.
+    Записи уровня ERROR и выше не трогаем.
+    Состояние по событиям ограничено MAX_KEYS: текст сообщения бывает переменным.
+    """
+    MAX_KEYS = 1000
+
+    def __init__(self, sample:Dict[str, float], rate_per_min:int):
+        super().__init__()
+        self.sample = sample
+        self.rate_per_min = rate_per_min
+        self._windows: Dict[str, list] = {}  # событие -> [начало окна, выпущено, подавлено]
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _trim(self, now:float):
+        # сначала выкидываем истёкшие окна, потом — самые старые события
+        for key in [k for k, w in self._windows.items() if now - w[0] >= 60]:
+            del self._windows[key]
+        for d in (self._windows, self._seen):
+            while len(d) > self.MAX_KEYS:
+                d.pop(next(iter(d)))
+
+    def _sample_rate(self, key:str) -> float:
+        for prefix, rate in self.sample.items():
+            if key.startswith(prefix):
+                return rate
+        return 1.0
+
+    def filter(self, record:logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or record.levelno < logging.WARNING:
+            return True
+        key = str(record.msg)
+        with self._lock:
+            rate = self._sample_rate(key)
+            if rate < 1.0:
+                # детерминированно: каждая round(1/rate)-я запись события
+                n = self._seen[key] = self._seen.get(key, 0) + 1
+                if len(self._seen) > self.MAX_KEYS:
+                    self._trim(time.monotonic())
+                if rate <= 0 or (n - 1) % max(1, round(1 / rate)):
+                    return False
+                record.sampled = rate
+            if self.rate_per_min <= 0:
+                return True
+            now = time.monotonic()
+            win = self._windows.get(key)
+            if win is None or now - win[0] >= 60:
+                suppressed = win[2] if win else 0
+                win = self._windows[key] = [now, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                if len(self._windows) > self.MAX_KEYS:
+                    self._trim(now)
+            if win[1] >= self.rate_per_min:
+                win[2] += 1
+                return False
+            win[1] += 1
+            return True
+
+class _LoopQueueHandler(QueueHandler):
+    """Кладёт запись в очередь как есть: форматирование — в потоке QueueListener.
+    В вызывающем потоке только снимаем контекст корреляции (contextvars в другой поток не переезжают).
+    """
+
+    def prepare(self, record:logging.LogRecord) -> logging.LogRecord:
+        for name, var in _CORRELATION:
+            value = var.get()
+            if value is not None and not hasattr(record, name):
+                setattr(record, name, value)
+        return record
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging(level:str = "INFO", fmt:str = "json", sample:Optional[Dict[str, float]] = None,
+                  rate_per_min:int = 20) -> logging.Logger:
+    """Настраивает корневой логгер один раз за процесс и возвращает логгер бота."""
+    global _listener
+    root = logging.getLogger()
+    if _listener is None:
+        out = logging.StreamHandler(sys.stdout)
+        out.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+        q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler = _LoopQueueHandler(q)
+        handler.addFilter(SamplingFilter(sample or {}, rate_per_min))
+        root.handlers[:] = [handler]
+        _listener = QueueListener(q, out, respect_handler_level=False)
+        _listener.start()
+        atexit.register(_listener.stop)
+    root.setLevel(level.upper())
+    # httpx пишет INFO на каждый запрос к Bot API — при нагрузке это большая часть логов
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return logging.getLogger("snackbot")
+
+def parse_sample(spec:str) -> Dict[str, float]:
+    """'items_json parse failed=0.1;Admin notify=0.5' -> {шаблон: доля}."""
+    result: Dict[str, float] = {}
+    for part in (spec or "").split(";"):
+        if "=" in part:
+            key, _, rate = part.rpartition("=")
+            result[key.strip()] = float(rate)
+    return result
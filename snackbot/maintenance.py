@@ -0,0 +1,173 @@
+# snackbot/maintenance.py
+# Фоновое обслуживание orders.db через job queue бота:
+# перенос закрытых заказов старше N дней в архивную базу (малыми пачками),
+# incremental vacuum + ANALYZE и онлайн-бэкап (sqlite3 backup API) в «тихие часы».
+# Разовый полный VACUUM для старых баз — только вручную через /fixdb vacuum.
+# Вся работа с диском — в пуле потоков, хендлеры в это время продолжают отвечать.
+
+import os, asyncio, sqlite3
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from telegram.ext import ContextTypes, JobQueue
+
+from . import config
+from .config import (
+    ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH, ARCHIVE_DB_PATH, QUIET_HOURS,
+    VACUUM_PAGES, BACKUP_DIR, BACKUP_KEEP, MAINTENANCE_INTERVAL_MIN, log
+)
+from .db import ORDER_KEYS, db_meta_get, db_meta_set
+
+TERMINAL_STATUSES = ("DELIVERED", "CANCELED")
+
+def parse_quiet_hours(spec:str) -> Tuple[int, int]:
+    """'3-6' -> (3, 6): с 03:00 до 06:00 по времени сервера; '23-5' переходит через полночь."""
+    start, _, end = spec.partition("-")
+    return int(start) % 24, int(end or start) % 24
+
+def in_quiet_hours(now:datetime, spec:str = QUIET_HOURS) -> bool:
+    start, end = parse_quiet_hours(spec)
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+# ---------------- DB (синхронно, вызывается через asyncio.to_thread) ----------------
+def db_archive_batch(older_than_days:int, limit:int) -> int:
+    """Переносит до limit закрытых заказов старше older_than_days в архив одной транзакцией.
+    Возвращает, сколько перенесено (0 — переносить больше нечего).
+    """
+    cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat(timespec="seconds")
+    cols = ", ".join(ORDER_KEYS)
+    conn = sqlite3.connect(config.DB_PATH, timeout=config.DB_TIMEOUT_S)
+    try:
+        conn.execute("ATTACH DATABASE ? AS arch", (ARCHIVE_DB_PATH,))
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS arch.orders (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER,
+                username TEXT,
+                room TEXT,
+                items_json TEXT,
+                note TEXT,
+                total INTEGER,
+                status TEXT,
+                created_at TEXT,
+                updated_at TEXT
+            )
+        """)
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT id FROM main.orders
+            WHERE status IN ({",".join("?" * len(TERMINAL_STATUSES))}) AND updated_at < ?
+            ORDER BY id LIMIT ?
+        """, (*TERMINAL_STATUSES, cutoff, limit))
+        ids: List[int] = [r[0] for r in cur.fetchall()]
+        if not ids:
+            return 0
+        marks = ",".join("?" * len(ids))
+        with conn:  # одна транзакция на обе базы: заказ либо в архиве, либо на месте
+            # статус перепроверяем: между SELECT и транзакцией заказ могли переоткрыть
+            term = ",".join("?" * len(TERMINAL_STATUSES))
+            conn.execute(f"INSERT OR REPLACE INTO arch.orders ({cols}) SELECT {cols} FROM main.orders "
+                         f"WHERE id IN ({marks}) AND status IN ({term})", (*ids, *TERMINAL_STATUSES))
+            moved = conn.execute(f"DELETE FROM main.orders WHERE id IN ({marks}) AND status IN ({term})",
+                                 (*ids, *TERMINAL_STATUSES)).rowcount
+        return moved
+    finally:
+        conn.close()
+
+def db_convert_auto_vacuum() -> bool:
+    """Разовый перевод старой базы в auto_vacuum=INCREMENTAL — полный VACUUM под эксклюзивной блокировкой.
+    Запускается только вручную (/fixdb vacuum), в тихое время. False — база уже переведена.
+    """
+    conn = sqlite3.connect(config.DB_PATH, timeout=config.DB_TIMEOUT_S)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        log.warning("Converting database to auto_vacuum=INCREMENTAL (full VACUUM, database locked)",
+                    extra={"db": config.DB_PATH, "pages": conn.execute("PRAGMA page_count").fetchone()[0]})
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    finally:
+        conn.close()
+
+def _freelist_count(conn:sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+def db_vacuum_analyze(pages:int) -> Tuple[int, int]:
+    """Incremental vacuum (если база уже в auto_vacuum=INCREMENTAL) + ANALYZE.
+    Возвращает (свободных страниц до, после).
+    """
+    conn = sqlite3.connect(config.DB_PATH, timeout=config.DB_TIMEOUT_S)
+    try:
+        before = _freelist_count(conn)
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode != 2:
+            # полный VACUUM держит эксклюзивную блокировку — сами не запускаем, только напоминаем
+            log.warning("auto_vacuum is not INCREMENTAL; run /fixdb vacuum once to enable incremental vacuum",
+                        extra={"freelist": before})
+            after = before
+        else:
+            # execute() шагает прагму один раз и освобождает одну страницу; executescript доводит до конца
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+            after = _freelist_count(conn)
+            if before and after >= before:
+                log.warning("Vacuum freed nothing", extra={"freelist_before": before, "freelist_after": after})
+        conn.execute("ANALYZE")
+        conn.commit()
+        return before, after
+    finally:
+        conn.close()
+
+def db_backup(backup_dir:str, keep:int) -> str:
+    """Онлайн-копия через backup API: пишет по 256 страниц, отпуская базу между шагами."""
+    os.makedirs(backup_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(config.DB_PATH))[0]
+    path = os.path.join(backup_dir, f"{name}-{datetime.now():%Y%m%d-%H%M%S}.db")
+    src = sqlite3.connect(config.DB_PATH, timeout=config.DB_TIMEOUT_S)
+    dst = sqlite3.connect(path)
+    try:
+        src.backup(dst, pages=256, sleep=0.05)
+    finally:
+        dst.close()
+        src.close()
+    old = sorted(f for f in os.listdir(backup_dir) if f.startswith(f"{name}-") and f.endswith(".db"))
+    for f in old[:-keep] if keep > 0 else []:
+        os.remove(os.path.join(backup_dir, f))
+    return path
+
+# ---------------- Job ----------------
+async def archive_old_orders() -> int:
+    moved = 0
+    while True:
+        n = await asyncio.to_thread(db_archive_batch, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH)
+        moved += n
+        if n < ARCHIVE_BATCH:
+            return moved
+        await asyncio.sleep(0.2)  # между пачками отпускаем базу для живых хендлеров
+
+async def maintenance_job(context: ContextTypes.DEFAULT_TYPE):
+    moved = await archive_old_orders()
+    if moved:
+        log.info("Archived orders", extra={"moved": moved, "archive": ARCHIVE_DB_PATH})
+
+    now = datetime.now()
+    if not in_quiet_hours(now):
+        return
+    last_day = (await asyncio.to_thread(db_meta_get, "maintenance_day"))[0]
+    if last_day == now.date().isoformat():
+        return  # тяжёлое обслуживание — не чаще раза в сутки
+
+    free_before, free_after = await asyncio.to_thread(db_vacuum_analyze, VACUUM_PAGES)
+    path = await asyncio.to_thread(db_backup, BACKUP_DIR, BACKUP_KEEP)
+    await asyncio.to_thread(db_meta_set, "maintenance_day", now.date().isoformat())
+    log.info("Maintenance done", extra={"backup": path, "freelist_before": free_before, "freelist_after": free_after})
+
+def schedule_maintenance(job_queue: JobQueue):
+    job_queue.run_repeating(
+        maintenance_job,
+        interval=timedelta(minutes=MAINTENANCE_INTERVAL_MIN),
+        first=timedelta(minutes=1),  # не мешаем холодному старту
+        name="db_maintenance",
+    )
@@ -0,0 +1,74 @@
+# snackbot/pipeline.py
+# Общий конвейер обработки апдейтов для webhook и polling:
+# разные чаты обрабатываются параллельно, апдейты одного чата — строго по очереди.
+
+import time, asyncio
+from typing import Dict, Any, Callable, List, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from .logs import UPDATE_ID, CHAT_ID, ORDER_ID
+from .tracing import span
+
+def _chat_key(update:object) -> Optional[int]:
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return None
+
+class ChatSerializedUpdateProcessor(BaseUpdateProcessor):
+    """Параллельно до max_concurrent апдейтов, но не больше одного на чат.
+    Сначала берём замок чата, потом общий слот — очередь одного чата не занимает слоты остальных.
+    done_callbacks вызываются после обработки каждого апдейта (ошибки хендлеров сюда не доходят —
+    их уже поймал Application.process_update).
+    """
+
+    # семафор базового класса — только защита от лавины задач, реальный лимит — self._slots
+    _BACKLOG_LIMIT = 4096
+
+    def __init__(self, max_concurrent:int):
+        super().__init__(self._BACKLOG_LIMIT)
+        self._slots = asyncio.BoundedSemaphore(max_concurrent)
+        self._locks: Dict[Any, asyncio.Lock] = {}
+        self._waiters: Dict[Any, int] = {}
+        self.done_callbacks: List[Callable[[object], None]] = []
+
+    async def do_process_update(self, update:object, coroutine) -> None:
+        key = _chat_key(update)
+        # контекст логов: каждый апдейт обрабатывается в своей задаче, так что значения не смешиваются
+        UPDATE_ID.set(getattr(update, "update_id", None))
+        CHAT_ID.set(key)
+        ORDER_ID.set(None)
+        queued = time.monotonic()
+        try:
+            with span("update", root=True, update_id=UPDATE_ID.get() or 0, chat_id=key or 0) as s:
+                if key is None:
+                    async with self._slots:
+                        await coroutine
+                    return
+                lock = self._locks.setdefault(key, asyncio.Lock())
+                self._waiters[key] = self._waiters.get(key, 0) + 1
+                try:
+                    async with lock, self._slots:
+                        if s:
+                            s.set("wait_ms", round((time.monotonic() - queued) * 1000, 3))
+                        await coroutine
+                finally:
+                    self._waiters[key] -= 1
+                    if not self._waiters[key]:
+                        # последний в очереди чата — замок больше не нужен
+                        del self._waiters[key]
+                        del self._locks[key]
+        finally:
+            for cb in self.done_callbacks:
+                cb(update)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
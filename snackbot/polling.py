@@ -0,0 +1,147 @@
+# snackbot/polling.py
+# Long polling без публичного адреса: getUpdates пачками в тот же конвейер, что и у вебхука.
+# Смещение подтверждаем Telegram (и сохраняем в meta) только до первого необработанного апдейта,
+# поэтому после рестарта ничего не теряется, а уже обработанное не приходит повторно.
+
+import asyncio, signal
+from typing import Optional, Set
+
+from telegram import Update
+from telegram.error import InvalidToken, NetworkError, TimedOut
+from telegram.ext import Application
+
+from .config import POLL_LIMIT, POLL_TIMEOUT, log
+from .db import db_meta_get, db_meta_set
+from .pipeline import ChatSerializedUpdateProcessor
+
+OFFSET_KEY = "poll_offset"
+
+class OffsetPoller:
+    """Цикл getUpdates(limit, timeout) с учётом обработанных апдейтов.
+    offset = min(в работе) либо max(полученных)+1: всё, что ниже, уже обработано.
+    Пока апдейт в работе, Telegram отдаёт его повторно — такие дубликаты отбрасываем.
+    Заодно это естественный backpressure: в работе не больше пачки апдейтов.
+    Смещение сохраняется, как только сдвинулось (с задержкой SAVE_DELAY_S, чтобы не писать
+    в базу на каждый апдейт), а не только после очередного getUpdates — long poll ждёт до timeout.
+    """
+    SAVE_DELAY_S = 1.0
+
+    def __init__(self, app: Application, limit:int = POLL_LIMIT, timeout:int = POLL_TIMEOUT):
+        self.app = app
+        self.limit = limit
+        self.timeout = timeout
+        self._inflight: Set[int] = set()
+        self._max_seen = -1
+        self._saved_offset = -1
+        self._progress = asyncio.Event()
+        self._stopping = False
+        self._fetch = None
+        self._save_task: Optional[asyncio.Task] = None
+        self._save_lock = asyncio.Lock()
+
+    @property
+    def offset(self) -> int:
+        return min(self._inflight) if self._inflight else self._max_seen + 1
+
+    def mark_done(self, update:object):
+        uid = getattr(update, "update_id", None)
+        if uid not in self._inflight:
+            return
+        head = uid == min(self._inflight)
+        self._inflight.discard(uid)
+        if not head:
+            # offset упирается в более ранний апдейт — новый getUpdates вернул бы те же дубликаты
+            return
+        self._progress.set()
+        if not self._save_task or self._save_task.done():
+            self._save_task = asyncio.ensure_future(self._save_offset_later())
+
+    def stop(self):
+        self._stopping = True
+        if self._fetch:
+            self._fetch.cancel()
+
+    async def _save_offset(self):
+        async with self._save_lock:  # иначе запись старого смещения может обогнать новую
+            offset = self.offset
+            if offset != self._saved_offset:
+                await asyncio.to_thread(db_meta_set, OFFSET_KEY, str(offset))
+                self._saved_offset = offset
+
+    async def _save_offset_later(self):
+        await asyncio.sleep(self.SAVE_DELAY_S)
+        await self._save_offset()
+
+    async def run(self):
+        saved = (await asyncio.to_thread(db_meta_get, OFFSET_KEY))[0]
+        self._max_seen = int(saved) - 1 if saved else -1
+        self._saved_offset = self.offset
+        log.info("Polling: offset=%s limit=%s timeout=%ss", self.offset, self.limit, self.timeout)
+
+        backoff = 1
+        while not self._stopping:
+            # всё обработанное к этому моменту — в базу до того, как повиснуть в long poll
+            await self._save_offset()
+            self._progress.clear()
+            self._fetch = asyncio.ensure_future(self.app.bot.get_updates(
+                offset=self.offset, limit=self.limit, timeout=self.timeout,
+                allowed_updates=Update.ALL_TYPES,
+            ))
+            try:
+                updates = await self._fetch
+            except asyncio.CancelledError:
+                if self._stopping:
+                    break
+                raise
+            except InvalidToken:
+                raise
+            except (NetworkError, TimedOut) as e:
+                log.warning("getUpdates failed: %r; retry in %ss", e, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            backoff = 1
+
+            fresh = [u for u in updates if u.update_id > self._max_seen]
+            for u in fresh:
+                self._inflight.add(u.update_id)
+                self._max_seen = u.update_id
+                await self.app.update_queue.put(u)
+
+            if updates and not fresh:
+                # пришли только апдейты, которые ещё в работе — ждём, пока что-нибудь завершится
+                try:
+                    await asyncio.wait_for(self._progress.wait(), timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+async def _polling_main(app: Application):
+    poller = OffsetPoller(app)
+    processor = app.update_processor
+    if not isinstance(processor, ChatSerializedUpdateProcessor):
+        raise RuntimeError("OffsetPoller требует ChatSerializedUpdateProcessor (см. app.build_app)")
+    processor.done_callbacks.append(poller.mark_done)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, poller.stop)
+        except NotImplementedError:  # Windows
+            pass
+
+    async with app:
+        # вебхук и getUpdates взаимоисключающие; CachedWebhookBot заодно сбросит кэш URL
+        await app.bot.delete_webhook()
+        if app.post_init:
+            await app.post_init(app)
+        await app.start()
+        try:
+            await poller.run()
+        finally:
+            # stop() дожидается апдейтов в работе — после него offset окончательный
+            await app.stop()
+            await poller._save_offset()
+            log.info("Polling stopped at offset=%s", poller.offset)
+
+def run_polling_loop(app: Application):
+    asyncio.run(_polling_main(app))
@@ -0,0 +1,94 @@
+# snackbot/profiler.py
+# Сэмплирующий профайлер для работающего процесса: отдельный поток раз в PROFILE_INTERVAL_MS
+# снимает стек потока event loop'а (sys._current_frames) и считает одинаковые стеки.
+# Включается админской командой /profile; результат — самые горячие функции/стеки
+# и файл в формате collapsed stacks (годится для flamegraph.pl / speedscope).
+
+import os, sys, time, threading
+from collections import Counter
+from datetime import datetime
+from typing import Optional, Tuple
+
+from .config import PROFILE_INTERVAL_MS, PROFILE_DIR
+
+Frame = Tuple[str, str, int]  # (файл, функция, строка)
+
+class SamplingProfiler:
+    MAX_DEPTH = 48
+
+    def __init__(self, interval_s:float):
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, thread_id:int, duration_s:float):
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, args=(thread_id, duration_s),
+                                        name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> bool:
+        """Останавливает запуск. False — останавливать нечего: не запускали или отчёт уже забрали."""
+        self._stop.set()
+        if not self._thread:
+            return False
+        self._thread.join()
+        self._thread = None
+        return True
+
+    def _run(self, thread_id:int, duration_s:float):
+        deadline = self.started_at + duration_s
+        while not self._stop.wait(self.interval_s) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and len(stack) < self.MAX_DEPTH:
+                code = frame.f_code
+                stack.append((os.path.basename(code.co_filename), code.co_name, frame.f_lineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(stack)] += 1  # от самого вложенного кадра к внешнему
+                self.samples += 1
+        self.elapsed = time.monotonic() - self.started_at
+
+    # ---------------- Отчёт ----------------
+    @staticmethod
+    def _fmt(frame:Frame) -> str:
+        return f"{frame[1]} ({frame[0]}:{frame[2]})"
+
+    def report(self, top:int = 8) -> str:
+        if not self.samples:
+            return "Сэмплов нет — профайлер не запускался или процесс простаивал."
+        own: Counter = Counter()
+        for stack, n in self.stacks.items():
+            own[stack[0][:2]] += n  # собственное время функции, без учёта строки
+        lines = [f"🔥 Профиль: {self.samples} сэмплов за {self.elapsed:.1f} с (шаг {self.interval_s * 1000:.0f} мс)",
+                 "", "Горячие функции (собственное время):"]
+        for (fname, func), n in own.most_common(top):
+            lines.append(f"{n * 100 / self.samples:5.1f}%  {func} ({fname})")
+        lines += ["", "Горячие стеки:"]
+        for stack, n in self.stacks.most_common(min(top, 5)):
+            lines.append(f"{n * 100 / self.samples:5.1f}%  " + " ← ".join(self._fmt(f) for f in stack[:4]))
+        return "\n".join(lines)[:4000]  # лимит сообщения Telegram — 4096
+
+    def dump_collapsed(self) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"profile-{datetime.now():%Y%m%d-%H%M%S}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(";".join(self._fmt(fr) for fr in reversed(stack)) + f" {n}\n")
+        return path
+
+PROFILER = SamplingProfiler(PROFILE_INTERVAL_MS / 1000)
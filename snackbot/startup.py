@@ -0,0 +1,10 @@
+# snackbot/startup.py
+# Профиль холодного старта: импортируется первым, поэтому отсчёт идёт почти от запуска процесса.
+
+import time
+
+_T0 = time.perf_counter()
+STARTUP_PROFILE: list = []  # [(этап, мс от старта процесса)] — печатается один раз, когда бот готов
+
+def mark(stage:str):
+    STARTUP_PROFILE.append((stage, round((time.perf_counter() - _T0) * 1000)))
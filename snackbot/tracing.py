@@ -0,0 +1,203 @@
+# snackbot/tracing.py
+# Опциональная трассировка: span на апдейт и вложенные span'ы на шаги (БД, вызовы Bot API, рендер).
+# Включается TRACE_EXPORT:
+#   file:traces.jsonl                        — JSON-строка на span
+#   otlp:http://127.0.0.1:4318/v1/traces     — OTLP/HTTP JSON (коллектор OpenTelemetry или локальная заглушка)
+# Без TRACE_EXPORT всё сводится к одному чтению contextvar на вызов. Экспорт — в отдельном потоке.
+
+import os, json, time, queue, atexit, random, asyncio, threading, contextvars, urllib.request
+from functools import wraps
+from typing import Dict, Any, List, Optional
+
+from telegram.request import HTTPXRequest
+
+from .config import TRACE_EXPORT, TRACE_SAMPLE, log
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List["_Span"] = []
+
+class _Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace:_Trace, name:str, parent_id:str, attrs:Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error = ""
+
+    def set(self, key:str, value:Any):
+        self.attrs[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start_ns": self.start_ns, "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attrs": self.attrs, "error": self.error,
+        }
+
+_CURRENT: contextvars.ContextVar[Optional[_Span]] = contextvars.ContextVar("trace_span", default=None)
+
+class span:
+    """with span("db.insert_order", order_id=1): ... — вложенный span, если идёт трассируемый апдейт.
+    root=True начинает новую трассу (с учётом TRACE_SAMPLE); вне трассы ничего не делает.
+    """
+    __slots__ = ("name", "attrs", "root", "_span", "_token")
+
+    def __init__(self, name:str, root:bool = False, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.root = root
+        self._span: Optional[_Span] = None
+        self._token = None
+
+    def __enter__(self) -> Optional[_Span]:
+        if self.root:
+            if _exporter is None or random.random() >= TRACE_SAMPLE:
+                return None
+            self._span = _Span(_Trace(), self.name, "", self.attrs)
+        else:
+            parent = _CURRENT.get()
+            if parent is None:
+                return None
+            self._span = _Span(parent.trace, self.name, parent.span_id, self.attrs)
+        self._token = _CURRENT.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        s = self._span
+        if s is None:
+            return False
+        s.end_ns = time.time_ns()
+        if exc is not None:
+            s.error = repr(exc)
+        s.trace.spans.append(s)
+        _CURRENT.reset(self._token)
+        if self.root:
+            _exporter.submit(s.trace.spans)
+        return False
+
+def traced(name:str):
+    """Декоратор: функция (обычная или async) пишется отдельным span'ом внутри текущей трассы."""
+    def deco(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def awrapper(*args, **kwargs):
+                if _CURRENT.get() is None:
+                    return await fn(*args, **kwargs)
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return awrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _CURRENT.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+class TracedRequest(HTTPXRequest):
+    """HTTPXRequest, который пишет каждый вызов Bot API span'ом bot.<метод> (токен из URL не попадает)."""
+
+    async def do_request(self, url:str, method:str, *args, **kwargs):
+        if _CURRENT.get() is None:
+            return await super().do_request(url, method, *args, **kwargs)
+        with span("bot." + url.rsplit("/", 1)[-1]) as s:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+            s.set("http.status_code", code)
+            return code, payload
+
+# ---------------- Экспорт ----------------
+def _otlp_value(value:Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_payload(spans:List[_Span]) -> Dict[str, Any]:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "snackbot"}}]},
+        "scopeSpans": [{"scope": {"name": "snackbot"}, "spans": [{
+            "traceId": s.trace.trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id,
+            "name": s.name,
+            "kind": 2 if not s.parent_id else 1,  # SERVER для апдейта, INTERNAL для шагов
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attrs.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        } for s in spans]}],
+    }]}
+
+class _Exporter:
+    """Готовые трассы копятся в очереди, поток раз в FLUSH_S (или по BATCH span'ов) отправляет пачку."""
+    FLUSH_S = 2.0
+    BATCH = 512
+
+    def __init__(self, target:str):
+        kind, _, dest = target.partition(":")
+        if kind not in ("file", "otlp") or not dest:
+            raise RuntimeError(f"TRACE_EXPORT: ожидается file:<путь> или otlp:<url>, получено {target!r}")
+        self.kind, self.dest = kind, dest
+        self._q: "queue.SimpleQueue[List[_Span]]" = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, spans:List[_Span]):
+        self._q.put(spans)
+
+    def _drain(self) -> List[_Span]:
+        batch: List[_Span] = []
+        while len(batch) < self.BATCH:
+            try:
+                batch.extend(self._q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch:List[_Span]):
+        if self.kind == "file":
+            with open(self.dest, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(s.to_dict(), ensure_ascii=False, default=repr) + "\n" for s in batch)
+            return
+        req = urllib.request.Request(self.dest, data=json.dumps(_otlp_payload(batch), default=repr).encode(),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            resp.read()
+
+    def _run(self):
+        while not self._stop.wait(self.FLUSH_S):
+            self.flush()
+
+    def flush(self):
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            try:
+                self._write(batch)
+            except Exception as e:
+                log.warning("Trace export failed: %r", e, extra={"spans": len(batch)})
+                return
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+_exporter: Optional[_Exporter] = _Exporter(TRACE_EXPORT) if TRACE_EXPORT else None
@@ -0,0 +1,51 @@
+# snackbot/ui.py
+# Форматирование корзины и inline-клавиатуры.
+
+from functools import lru_cache
+from typing import Dict
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from .config import MENU
+
+def fmt_items(cart:Dict[str,int])->str:
+    if not cart: return "—"
+    return "\n".join(f"• {MENU[k][0]} ×{q} = {MENU[k][1]*q}₽" for k,q in cart.items() if k in MENU)
+
+def get_cart_subtotal(cart:Dict[str,int])->int:
+    return sum(MENU[i][1]*q for i,q in cart.items() if i in MENU)
+
+@lru_cache(maxsize=1)
+def menu_keyboard()->InlineKeyboardMarkup:
+    # MENU не меняется во время работы, а InlineKeyboardMarkup неизменяем — строим один раз
+    rows = [[InlineKeyboardButton(f"{v[0]} — {v[1]}₽", callback_data=f"add:{k}")] for k,v in MENU.items()]
+    rows.append([InlineKeyboardButton("🧺 Корзина", callback_data="cart"),
+                 InlineKeyboardButton("✅ Оформить", callback_data="checkout")])
+    rows.append([InlineKeyboardButton("🏫 Сменить аудиторию", callback_data="change_room"),
+                 InlineKeyboardButton("📜 Мои заказы", callback_data="history")])
+    return InlineKeyboardMarkup(rows)
+
+def admin_order_kb(order_id:int)->InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("✅ Принять", callback_data=f"adm:{order_id}:ACCEPTED"),
+         InlineKeyboardButton("🛵 В пути", callback_data=f"adm:{order_id}:ON_THE_WAY")],
+        [InlineKeyboardButton("📦 Доставлен", callback_data=f"adm:{order_id}:DELIVERED"),
+         InlineKeyboardButton("🚫 Отмена", callback_data=f"adm:{order_id}:CANCELED")]
+    ])
+
+def batch_kb(batch_id:int)->InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("✅ Принять все", callback_data=f"bat:{batch_id}:ACCEPTED"),
+         InlineKeyboardButton("🛵 Все в пути", callback_data=f"bat:{batch_id}:ON_THE_WAY")],
+        [InlineKeyboardButton("📦 Все доставлены", callback_data=f"bat:{batch_id}:DELIVERED")]
+    ])
+
+def cart_keyboard(cart:Dict[str,int])->InlineKeyboardMarkup:
+    kb = []
+    for k,q in cart.items():
+        if k in MENU:
+            kb.append([InlineKeyboardButton(f"➖ Убрать {MENU[k][0]}", callback_data=f"del:{k}")])
+    kb.append([InlineKeyboardButton("➕ Добавить ещё", callback_data="back2menu"),
+               InlineKeyboardButton("✅ Оформить", callback_data="checkout")])
+    return InlineKeyboardMarkup(kb)
+
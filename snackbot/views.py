@@ -0,0 +1,126 @@
+# snackbot/views.py
+# Экраны бота из состояния сессии: текст + клавиатура.
+# Блоки «позиции» и «💰 Товары / 🚚 Доставка / Итого» кэшируются по содержимому корзины,
+# а edit_view не шлёт edit_message_text, если чат уже видит ровно этот экран.
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+from telegram import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
+
+from .config import DELIVERY_FEE, VIEW_CACHE_SIZE
+from .tracing import traced
+from .ui import fmt_items, get_cart_subtotal, menu_keyboard, cart_keyboard
+
+View = Tuple[str, Optional[InlineKeyboardMarkup]]
+
+ROOM_PROMPT = "Введи аудиторию (цифры + буква, например 429Г):"
+
+# ---------------- Фрагменты ----------------
+def _cart_key(cart:Dict[str, int]) -> tuple:
+    # порядок важен: позиции выводятся в порядке добавления
+    return tuple(cart.items())
+
+@lru_cache(maxsize=1024)
+def _items_block(cart_key:tuple) -> str:
+    return fmt_items(dict(cart_key))
+
+@lru_cache(maxsize=1024)
+def _totals_block(cart_key:tuple, total_label:str) -> str:
+    subtotal = get_cart_subtotal(dict(cart_key))
+    return (f"💰 Товары: {subtotal}₽\n"
+            f"🚚 Доставка: {DELIVERY_FEE}₽\n"
+            f"{total_label}: {subtotal + DELIVERY_FEE}₽")
+
+@lru_cache(maxsize=1024)
+def _cart_keyboard(cart_key:tuple) -> InlineKeyboardMarkup:
+    # InlineKeyboardMarkup неизменяем — одну и ту же клавиатуру можно отдавать многим чатам
+    return cart_keyboard(dict(cart_key))
+
+def items_block(cart:Dict[str, int]) -> str:
+    return _items_block(_cart_key(cart))
+
+def totals_block(cart:Dict[str, int], total_label:str = "Итого") -> str:
+    return _totals_block(_cart_key(cart), total_label)
+
+def cart_total(cart:Dict[str, int]) -> int:
+    return get_cart_subtotal(cart) + DELIVERY_FEE
+
+@lru_cache(maxsize=1)
+def checkout_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([[InlineKeyboardButton("✍️ Добавить комментарий", callback_data="add_comment")],
+                                 [InlineKeyboardButton("💳 Подтвердить без комментария", callback_data="confirm")]])
+
+@lru_cache(maxsize=1)
+def confirm_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([[InlineKeyboardButton("💳 Подтвердить заказ", callback_data="confirm")]])
+
+# ---------------- Экраны ----------------
+def menu_view(text:str) -> View:
+    return text, menu_keyboard()
+
+@traced("render.cart")
+def cart_view(st:Dict[str, Any], header:str = "🧺 Твоя корзина:", footer:str = "") -> View:
+    cart = st["cart"]
+    if not cart:
+        return menu_view("Корзина пуста.")
+    text = f"{header}\n{items_block(cart)}\n\n{totals_block(cart)}"
+    return (text + footer if footer else text), _cart_keyboard(_cart_key(cart))
+
+@traced("render.checkout")
+def checkout_view(st:Dict[str, Any]) -> View:
+    cart = st["cart"]
+    text = f"Проверь заказ:\n📍 Аудитория {st['room']}\n{items_block(cart)}\n\n{totals_block(cart, 'Итого к оплате')}"
+    return text, checkout_keyboard()
+
+@traced("render.confirm_prompt")
+def confirm_prompt_view(st:Dict[str, Any], header:str) -> View:
+    return f"{header}\nПроверь сумму и подтверди заказ:\n{totals_block(st['cart'], 'Итого к оплате')}", confirm_keyboard()
+
+@traced("render.receipt")
+def receipt_text(order_id:int, cart:Dict[str, int], note:str) -> str:
+    return f"✅ Заказ #{order_id} принят!\n\n{totals_block(cart, 'Итого к оплате')}\nКомментарий: {note}"
+
+@traced("render.admin_order")
+def admin_order_text(order_id:int, username:str, user_id:int, room:str, cart:Dict[str, int], note:str) -> str:
+    return (f"🆕 Заказ #{order_id}\n"
+            f"От @{username or '—'} (id {user_id})\n"
+            f"Аудитория: {room}\n"
+            f"{items_block(cart)}\n\n"
+            f"{totals_block(cart)}\n"
+            f"Комментарий: {note}")
+
+# ---------------- Отправка без лишних правок ----------------
+_LAST_SENT: "OrderedDict[Tuple[int, int], int]" = OrderedDict()  # (chat_id, message_id) -> отпечаток экрана
+
+def _remember(message:Message, view:View):
+    key = (message.chat.id, message.message_id)
+    _LAST_SENT[key] = hash(view)
+    _LAST_SENT.move_to_end(key)
+    while len(_LAST_SENT) > VIEW_CACHE_SIZE:
+        _LAST_SENT.popitem(last=False)
+
+async def edit_view(query:CallbackQuery, view:View) -> bool:
+    """edit_message_text, только если экран поменялся. False — правка не понадобилась."""
+    text, markup = view
+    msg = query.message
+    key = (msg.chat.id, msg.message_id)
+    # сообщение из callback уже содержит то, что видит пользователь — сверяемся и с ним
+    if _LAST_SENT.get(key) == hash(view) or (msg.text == text and msg.reply_markup == markup):
+        return False
+    try:
+        await query.edit_message_text(text, reply_markup=markup)
+    except BadRequest as e:
+        if "not modified" not in str(e).lower():
+            raise
+        return False
+    _remember(msg, view)
+    return True
+
+async def reply_view(message:Message, view:View) -> Message:
+    text, markup = view
+    sent = await message.reply_text(text, reply_markup=markup)
+    _remember(sent, view)
+    return sent
@@ -0,0 +1,24 @@
+# tests/conftest.py
+# Общие фикстуры: пакет snackbot из корня репозитория и временная база вместо orders.db.
+
+import os, sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("LOG_FORMAT", "text")
+
+from snackbot import config, history, maintenance  # noqa: E402
+from snackbot.db import db_init  # noqa: E402
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Пустая временная orders.db (и архив рядом); кэш истории сбрасывается."""
+    path = str(tmp_path / "orders.db")
+    monkeypatch.setattr(config, "DB_PATH", path)
+    monkeypatch.setattr(maintenance, "ARCHIVE_DB_PATH", str(tmp_path / "orders_archive.db"))
+    history._CACHE.clear()
+    db_init()
+    yield path
+    history._CACHE.clear()
@@ -0,0 +1,41 @@
+# tests/test_batching.py
+
+from snackbot.batching import room_group_key, build_batches, register_batch, get_batch
+from snackbot.db import db_insert_order, db_update_status, db_open_orders, db_open_rooms
+
+def test_room_group_key():
+    assert room_group_key("429Г") == ("Г", "4")
+    assert room_group_key("1012а") == ("А", "10")
+    assert room_group_key("12Б") == ("Б", "0")
+    assert room_group_key("") == ("?", "?")
+    assert room_group_key("спортзал") == ("?", "?")
+
+def test_build_batches_groups_and_sums():
+    orders = [
+        {"id": 1, "room": "429Г", "items": {"cola": 1}, "total": 99},
+        {"id": 2, "room": "431г", "items": {"cola": 2, "chips": 1}, "total": 270},
+        {"id": 3, "room": "101А", "items": {"water": 1}, "total": 44},
+        {"id": 4, "room": None, "items": {}, "total": 0},
+    ]
+    batches = build_batches(orders)
+    assert [b["key"] for b in batches] == [("Г", "4"), ("?", "?"), ("А", "1")]
+    big = batches[0]
+    assert [o["id"] for o in big["orders"]] == [1, 2]
+    assert big["items"] == {"cola": 3, "chips": 1}
+    assert big["total"] == 369
+
+def test_open_orders_and_rooms(db):
+    a = db_insert_order(1, "a", "429Г", {"cola": 1}, "", 99)
+    b = db_insert_order(2, "b", "431Г", {"chips": 1}, "", 72)
+    c = db_insert_order(3, "c", "101А", {"water": 1}, "", 44)
+    db_update_status(c, "DELIVERED")
+    assert [o["id"] for o in db_open_orders(30)] == [a, b]
+    assert sorted(db_open_rooms(30)) == ["429Г", "431Г"]
+
+def test_batches_are_persisted(db):
+    first = register_batch([1, 2, 3])
+    second = register_batch([4])
+    assert second == first + 1
+    assert get_batch(first) == [1, 2, 3]
+    assert get_batch(second) == [4]
+    assert get_batch(999) == []
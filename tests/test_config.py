@@ -0,0 +1,46 @@
+# tests/test_config.py
+# Слои конфига: значения по умолчанию -> файл SF_CONFIG -> окружение.
+# Конфиг читается при импорте, поэтому каждый вариант — в отдельном процессе.
+
+import os, sys, json, subprocess
+
+from conftest import ROOT
+
+def _load(tmp_path, env:dict) -> dict:
+    code = ("import json; from snackbot import config as c; "
+            "print(json.dumps({'fee': c.DELIVERY_FEE, 'menu': c.MENU, 'admins': sorted(c.ADMIN_IDS), "
+            "'fast': c.FAST_START, 'poll_limit': c.POLL_LIMIT}))")
+    base = {k: v for k, v in os.environ.items() if k not in ("SF_CONFIG", "DELIVERY_FEE", "ADMIN_IDS", "FAST_START", "RENDER")}
+    base.update(PYTHONPATH=ROOT, LOG_FORMAT="text", **env)
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=base,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def test_defaults_without_file(tmp_path):
+    cfg = _load(tmp_path, {})
+    assert cfg["fee"] == 0
+    assert cfg["menu"]["energy"] == ["ЭНЕРГИЯ", 59]
+    assert cfg["fast"] is False
+
+def test_sf_render_file_overrides_defaults(tmp_path):
+    cfg = _load(tmp_path, {"SF_CONFIG": os.path.join(ROOT, "sf_render", "config.json")})
+    assert cfg["fee"] == 99
+    assert cfg["menu"]["energy"] == ["ЭНЕРГЕТИК", 65]
+    assert list(cfg["menu"])[0] == "energy"  # порядок кнопок — как в файле
+    assert "twix" not in cfg["menu"]
+
+def test_env_overrides_file(tmp_path):
+    path = tmp_path / "cfg.json"
+    path.write_text(json.dumps({"DELIVERY_FEE": 99, "ADMIN_IDS": [1, 2], "FAST_START": True, "POLL_LIMIT": 500}))
+    cfg = _load(tmp_path, {"SF_CONFIG": str(path), "DELIVERY_FEE": "15"})
+    assert cfg["fee"] == 15
+    assert cfg["admins"] == [1, 2]
+    assert cfg["fast"] is True
+    assert cfg["poll_limit"] == 100  # getUpdates больше 100 не отдаёт
+
+def test_missing_sf_config_file_fails(tmp_path):
+    code = "from snackbot import config"
+    env = dict(os.environ, PYTHONPATH=ROOT, SF_CONFIG=str(tmp_path / "nope.json"))
+    res = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert res.returncode != 0
+    assert "SF_CONFIG" in res.stderr
@@ -0,0 +1,26 @@
+# tests/test_history.py
+
+from snackbot.config import MENU
+from snackbot.db import db_insert_order
+from snackbot.history import restore_cart, find_user_order, get_history
+
+def test_restore_cart_drops_missing_items():
+    known = next(iter(MENU))
+    cart, dropped = restore_cart({known: 2, "discontinued": 1, "zero": 0})
+    assert cart == {known: 2}
+    assert sorted(dropped) == ["discontinued", "zero"]
+
+def test_find_user_order_checks_owner(db):
+    oid = db_insert_order(1, "a", "429Г", {"cola": 1}, "", 99)
+    assert find_user_order(1, oid)["id"] == oid
+    assert find_user_order(2, oid) is None
+    assert find_user_order(1, oid + 100) is None
+
+def test_find_user_order_beyond_history_limit(db, monkeypatch):
+    from snackbot import history
+    monkeypatch.setattr(history, "HISTORY_LIMIT", 2)
+    old = db_insert_order(1, "a", "429Г", {"cola": 1}, "", 99)
+    for _ in range(3):
+        db_insert_order(1, "a", "429Г", {"chips": 1}, "", 72)
+    assert old not in [o["id"] for o in get_history(1)]
+    assert find_user_order(1, old)["items"] == {"cola": 1}
@@ -0,0 +1,60 @@
+# tests/test_maintenance.py
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from snackbot import config, maintenance
+from snackbot.db import db_insert_order, db_update_status, db_get_order
+from snackbot.maintenance import db_archive_batch, db_vacuum_analyze, in_quiet_hours
+
+def _age(order_id:int, days:int):
+    ts = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.execute("UPDATE orders SET updated_at=? WHERE id=?", (ts, order_id))
+    conn.commit()
+    conn.close()
+
+def test_archive_moves_only_old_closed_orders(db):
+    old_done = db_insert_order(1, "a", "429Г", {"cola": 1}, "", 99)
+    old_open = db_insert_order(1, "a", "429Г", {"cola": 1}, "", 99)
+    new_done = db_insert_order(1, "a", "429Г", {"cola": 1}, "", 99)
+    db_update_status(old_done, "DELIVERED")
+    db_update_status(new_done, "CANCELED")
+    _age(old_done, 40)
+    _age(old_open, 40)
+
+    assert db_archive_batch(30, 10) == 1
+    assert db_archive_batch(30, 10) == 0
+    assert db_get_order(old_done) is None
+    assert db_get_order(old_open) and db_get_order(new_done)
+    arch = sqlite3.connect(maintenance.ARCHIVE_DB_PATH)
+    assert arch.execute("SELECT id, status FROM orders").fetchall() == [(old_done, "DELIVERED")]
+    arch.close()
+
+def test_archive_respects_batch_size(db):
+    for _ in range(5):
+        oid = db_insert_order(1, "a", "429Г", {"cola": 1}, "", 99)
+        db_update_status(oid, "DELIVERED")
+        _age(oid, 40)
+    assert db_archive_batch(30, 2) == 2
+    assert db_archive_batch(30, 2) == 2
+    assert db_archive_batch(30, 2) == 1
+
+def test_incremental_vacuum_shrinks_freelist(db):
+    conn = sqlite3.connect(config.DB_PATH)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # новая база создаётся сразу INCREMENTAL
+    conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [(f"k{i}", "x" * 2000) for i in range(500)])
+    conn.commit()
+    conn.execute("DELETE FROM meta")
+    conn.commit()
+    conn.close()
+    before, after = db_vacuum_analyze(100000)
+    assert before > 100
+    assert after < before
+
+def test_quiet_hours():
+    at = lambda h: datetime(2024, 1, 1, h)
+    assert in_quiet_hours(at(3), "3-6") and in_quiet_hours(at(5), "3-6")
+    assert not in_quiet_hours(at(6), "3-6")
+    assert in_quiet_hours(at(23), "23-5") and in_quiet_hours(at(2), "23-5")
+    assert not in_quiet_hours(at(12), "23-5")
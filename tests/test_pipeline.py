@@ -0,0 +1,46 @@
+# tests/test_pipeline.py
+# ChatSerializedUpdateProcessor: чаты параллельно, апдейты одного чата — по очереди.
+
+import asyncio, random
+from datetime import datetime
+from typing import List, Tuple
+
+from telegram import Chat, Message, Update
+
+from snackbot.pipeline import ChatSerializedUpdateProcessor
+
+def _update(update_id:int, chat_id:int) -> Update:
+    chat = Chat(id=chat_id, type=Chat.PRIVATE)
+    return Update(update_id=update_id, message=Message(message_id=update_id, date=datetime.now(), chat=chat))
+
+async def _run(max_concurrent:int) -> Tuple[List[Tuple[int, int]], int, List[int]]:
+    proc = ChatSerializedUpdateProcessor(max_concurrent)
+    done: List[int] = []
+    proc.done_callbacks.append(lambda u: done.append(u.update_id))
+    log: List[Tuple[int, int]] = []
+    active = peak = 0
+    rnd = random.Random(1)
+
+    async def handler(chat_id:int, update_id:int):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(rnd.random() * 0.01)
+        log.append((chat_id, update_id))
+        active -= 1
+
+    updates = [_update(i, 100 + i % 3) for i in range(1, 31)]
+    await asyncio.gather(*(proc.process_update(u, handler(u.effective_chat.id, u.update_id)) for u in updates))
+    return log, peak, done
+
+def test_per_chat_order_is_kept():
+    log, peak, done = asyncio.run(_run(max_concurrent=8))
+    for chat_id in (100, 101, 102):
+        seq = [uid for cid, uid in log if cid == chat_id]
+        assert seq == sorted(seq) and len(seq) == 10
+    assert 1 < peak <= 3  # разные чаты параллельно, но не больше одного апдейта на чат
+    assert sorted(done) == list(range(1, 31))
+
+def test_concurrency_limit():
+    _, peak, _ = asyncio.run(_run(max_concurrent=1))
+    assert peak == 1
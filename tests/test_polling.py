@@ -0,0 +1,75 @@
+# tests/test_polling.py
+# OffsetPoller на фейковом боте: продолжение с сохранённого offset, без повторной обработки.
+
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+from telegram import Update
+
+from snackbot.db import db_meta_get, db_meta_set
+from snackbot.polling import OffsetPoller, OFFSET_KEY
+
+class _FakeBot:
+    """getUpdates как у Telegram: всё начиная с offset, пока offset его не подтвердит."""
+
+    def __init__(self, ids:List[int]):
+        self.updates = [Update(update_id=i) for i in ids]
+        self.offsets: List[int] = []
+
+    async def get_updates(self, offset, limit, timeout, allowed_updates):
+        self.offsets.append(offset)
+        batch = [u for u in self.updates if u.update_id >= offset][:limit]
+        if not batch:
+            await asyncio.sleep(timeout)
+        return batch
+
+async def _run(bot:_FakeBot, expected:int, delays=None) -> List[int]:
+    """Гоняет poller, пока обработчик не увидит expected апдейтов; возвращает порядок обработки."""
+    app = SimpleNamespace(bot=bot, update_queue=asyncio.Queue())
+    poller = OffsetPoller(app, limit=100, timeout=1)  # stop() отменяет висящий long poll
+    poller.SAVE_DELAY_S = 0
+    done: List[int] = []
+
+    async def handle(u):
+        await asyncio.sleep((delays or {}).get(u.update_id, 0))
+        done.append(u.update_id)
+        poller.mark_done(u)
+
+    async def consume():
+        for _ in range(expected):
+            u = await app.update_queue.get()
+            asyncio.ensure_future(handle(u))
+        while len(done) < expected:
+            await asyncio.sleep(0.01)
+
+    task = asyncio.ensure_future(poller.run())
+    await asyncio.wait_for(consume(), timeout=5)
+    await asyncio.sleep(0.05)
+    poller.stop()
+    await task
+    await poller._save_offset()
+    return done
+
+def test_resumes_from_saved_offset(db):
+    db_meta_set(OFFSET_KEY, "13")
+    bot = _FakeBot([11, 12, 13, 14, 15])
+    done = asyncio.run(_run(bot, expected=3))
+    assert bot.offsets[0] == 13
+    assert sorted(done) == [13, 14, 15]
+    assert db_meta_get(OFFSET_KEY)[0] == "16"
+
+def test_inflight_duplicates_are_dropped(db):
+    bot = _FakeBot([1, 2, 3, 4])
+    # первый апдейт медленный: пока он в работе, Telegram повторяет всю пачку
+    done = asyncio.run(_run(bot, expected=4, delays={1: 0.2}))
+    assert sorted(done) == [1, 2, 3, 4]
+    assert len(done) == len(set(done))
+    assert db_meta_get(OFFSET_KEY)[0] == "5"
+
+def test_completions_behind_head_do_not_refetch(db):
+    bot = _FakeBot([1, 2, 3, 4, 5])
+    asyncio.run(_run(bot, expected=5, delays={1: 0.3, 2: 0.05, 3: 0.1, 4: 0.15, 5: 0.2}))
+    # пачка, один повтор с дубликатами (ждём, пока голова окна #1 не завершится), следующая пачка —
+    # завершение #2..#5 раньше #1 лишних getUpdates не вызывает
+    assert bot.offsets == [0, 1, 6]
@@ -0,0 +1,40 @@
+# tests/test_views.py
+# edit_view не должен слать edit_message_text, если чат уже видит этот экран.
+
+import asyncio
+from types import SimpleNamespace
+
+from snackbot.views import cart_view, menu_view, edit_view, totals_block, cart_total
+from snackbot.config import DELIVERY_FEE, MENU
+
+class _Query:
+    def __init__(self, chat_id:int, message_id:int):
+        self.message = SimpleNamespace(chat=SimpleNamespace(id=chat_id), message_id=message_id,
+                                       text="старый текст", reply_markup=None)
+        self.edits = 0
+
+    async def edit_message_text(self, text, reply_markup=None):
+        self.edits += 1
+
+def test_edit_view_skips_repeated_screen():
+    q = _Query(1, 100)
+    st = {"cart": {next(iter(MENU)): 1}}
+    assert asyncio.run(edit_view(q, cart_view(st))) is True
+    assert asyncio.run(edit_view(q, cart_view(st))) is False
+    assert q.edits == 1
+    st["cart"][next(iter(MENU))] = 2
+    assert asyncio.run(edit_view(q, cart_view(st))) is True
+    assert q.edits == 2
+
+def test_edit_view_compares_with_visible_message():
+    q = _Query(2, 200)
+    view = menu_view("Продолжай выбирать:")
+    q.message.text, q.message.reply_markup = view
+    assert asyncio.run(edit_view(q, view)) is False
+    assert q.edits == 0
+
+def test_totals_include_delivery():
+    code, (_, price) = next(iter(MENU.items()))
+    cart = {code: 2}
+    assert cart_total(cart) == 2 * price + DELIVERY_FEE
+    assert totals_block(cart).endswith(f"Итого: {2 * price + DELIVERY_FEE}₽")